@@ -0,0 +1,201 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7bench.py
+# Benchmark suite with a synthetic bank corpus generator. Writes random but
+# valid 32-voice banks (every parameter in range, correct header and
+# checksum) and times each stage of a conversion separately:
+# file read and validation, parsing, rendering and writing the sheets.
+# Alternative engines (Voice objects, the NumPy decoder, the precompiled
+# renderer) are timed next to the original code paths.
+#
+# python dx7bench.py --banks 500 -o bench.json   runs the suite
+# python dx7bench.py --generate Corpus/ --banks 10000
+#                                                writes a synthetic corpus
+#
+# Results are written as JSON so runs can be compared between versions.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+
+from dx7sheet_32 import (build_sysex, iter_voice_banks, read_bank, parse_single_voice,
+                         generate_datasheet, render_datasheet, sanitize_filename)
+
+def random_voice(rng):
+    """Returns 128 packed bytes with every parameter inside its DX7 range."""
+    data = bytearray()
+    for _ in range(6):
+        data += bytes(rng.randint(0, 99) for _ in range(11))       # EG, break point, depths
+        data.append(rng.randint(0, 3) | rng.randint(0, 3) << 2)    # curves
+        data.append(rng.randint(0, 7) | rng.randint(0, 14) << 3)   # rate scaling, detune
+        data.append(rng.randint(0, 3) | rng.randint(0, 7) << 2)    # amp mod sens, key velocity
+        data.append(rng.randint(0, 99))                            # output level
+        data.append(rng.randint(0, 1) | rng.randint(0, 31) << 1)   # osc mode, coarse
+        data.append(rng.randint(0, 99))                            # fine
+    data += bytes(rng.randint(0, 99) for _ in range(8))            # pitch EG
+    data.append(rng.randint(0, 31))                                # algorithm
+    data.append(rng.randint(0, 7) | rng.randint(0, 1) << 3)        # feedback, osc key sync
+    data += bytes(rng.randint(0, 99) for _ in range(4))            # LFO speed, delay, PMD, AMD
+    data.append(rng.randint(0, 1) | rng.randint(0, 5) << 1 | rng.randint(0, 7) << 4)
+    data.append(rng.randint(0, 48))                                # transpose
+    data += bytes(rng.randint(32, 126) for _ in range(10))         # name
+    return bytes(data)
+
+def random_bank(rng):
+    """Returns a complete 4104-byte 32-voice SysEx bank."""
+    return build_sysex(b"".join(random_voice(rng) for _ in range(32)))
+
+def generate_corpus(directory, banks, seed=0):
+    """Writes banks synthetic .syx files into directory and returns their paths."""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(banks):
+        path = os.path.join(directory, f"synthetic_{i:06d}.syx")
+        with open(path, 'wb') as f:
+            f.write(random_bank(rng))
+        paths.append(path)
+    return paths
+
+def timed(func, repeat):
+    """Runs func repeat times and returns (best wall time, result of the last run)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run_suite(paths, workdir, repeat=3):
+    """Times every stage over the given banks. Returns the results dict."""
+    stages = {}
+
+    def record(name, seconds, items, unit):
+        stages[name] = {'seconds': round(seconds, 6), 'items': items, 'unit': unit,
+                        'per_second': round(items / seconds, 1) if seconds else None}
+
+    def read_plain():
+        return [read_bank(path) for path in paths]
+
+    def read_scanner():
+        bodies = []
+        for path in paths:
+            bodies.extend(bytes(body) for _, body in iter_voice_banks(path))
+        return bodies
+
+    seconds, bodies = timed(read_plain, repeat)
+    record('read_validate', seconds, len(paths), 'banks')
+    seconds, _ = timed(read_scanner, repeat)
+    record('read_validate_mmap_scanner', seconds, len(paths), 'banks')
+
+    voices = [body[i:i+128] for body in bodies for i in range(0, 4096, 128)]
+
+    seconds, parsed = timed(lambda: [parse_single_voice(voice) for voice in voices], repeat)
+    record('parse_single_voice', seconds, len(voices), 'voices')
+
+    import dx7model
+    seconds, _ = timed(lambda: [dx7model.Voice.from_bytes(voice) for voice in voices], repeat)
+    record('parse_voice_model', seconds, len(voices), 'voices')
+
+    try:
+        import numpy as np
+        import dx7vector
+    except ImportError:
+        pass
+    else:
+        array = np.frombuffer(b"".join(bodies), dtype=np.uint8).reshape(-1, 128)
+        seconds, _ = timed(lambda: dx7vector.decode_voices(array), repeat)
+        record('parse_numpy_columns', seconds, len(voices), 'voices')
+
+    def render(renderer):
+        return [renderer(params, "synthetic.syx", i % 32 + 1) for i, params in enumerate(parsed)]
+
+    seconds, sheets = timed(lambda: render(generate_datasheet), repeat)
+    record('generate_datasheet', seconds, len(sheets), 'sheets')
+    seconds, _ = timed(lambda: render(render_datasheet), repeat)
+    record('render_datasheet', seconds, len(sheets), 'sheets')
+
+    def write():
+        output_dir = os.path.join(workdir, "Sheet")
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        written = 0
+        for i, (params, sheet) in enumerate(zip(parsed, sheets)):
+            filename = f"{i:07d}_{sanitize_filename(params['name'])}.txt"
+            with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+                written += f.write(sheet)
+        return written
+
+    seconds, written = timed(write, repeat)
+    record('write_sheets', seconds, len(sheets), 'files')
+    stages['write_sheets']['bytes'] = written
+
+    return stages
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the conversion stages on a synthetic DX7 bank corpus.")
+    parser.add_argument('--banks', type=int, default=100,
+                        help="number of synthetic banks (default: 100)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="runs per stage, the fastest one counts (default: 3)")
+    parser.add_argument('-o', '--output',
+                        help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--generate', metavar='DIR',
+                        help="only write the synthetic corpus into DIR and exit")
+    args = parser.parse_args()
+
+    if args.generate:
+        paths = generate_corpus(args.generate, args.banks, args.seed)
+        print(f"Wrote {len(paths)} synthetic banks to '{args.generate}/'.")
+        return
+
+    workdir = tempfile.mkdtemp(prefix="dx7bench-")
+    try:
+        paths = generate_corpus(os.path.join(workdir, "banks"), args.banks, args.seed)
+        stages = run_suite(paths, workdir, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'banks': args.banks,
+        'voices': args.banks * 32,
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'stages': stages,
+    }
+
+    # The table goes to stderr so stdout stays pure JSON without --output
+    print(f"{'STAGE':<28}{'SECONDS':>10}{'PER SECOND':>14}", file=sys.stderr)
+    print("-" * 52, file=sys.stderr)
+    for name, stage in stages.items():
+        print(f"{name:<28}{stage['seconds']:>10.4f}{stage['per_second'] or 0:>14,.0f} {stage['unit']}",
+              file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to '{args.output}'.", file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7catalog.py
+# SQLite patch catalog. Every voice of every bank is stored with its raw
+# 128 bytes, its content hash and the most searched parameters, with
+# indexes on name, algorithm, feedback, LFO wave and hash. Queries render
+# the matching voices straight from the catalog with generate_datasheet().
+#
+# python dx7catalog.py update Archive/
+# python dx7catalog.py query --algorithm 5 --feedback 7 --lfo-wave square
+# python dx7catalog.py query --name "brass%" --list
+#
+# Updates are incremental: files with unchanged size and mtime are skipped,
+# files that were touched but whose content hash is the same only get their
+# stat data refreshed. Loads run in batched transactions.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import sqlite3
+import argparse
+
+from dx7sheet_32 import (LFO_WAVES, collect_syx_files, iter_voice_banks, parse_single_voice,
+                         generate_datasheet, sanitize_filename, file_digest)
+from dx7index import voice_hashes
+
+CATALOG_FILE = ".dx7catalog.sqlite"
+CATALOG_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id       INTEGER PRIMARY KEY,
+    path     TEXT NOT NULL UNIQUE,
+    size     INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS voices (
+    file_id    INTEGER NOT NULL REFERENCES files(id),
+    bank       INTEGER NOT NULL,
+    voice      INTEGER NOT NULL,
+    name       TEXT NOT NULL,
+    hash       TEXT NOT NULL,
+    param_hash TEXT NOT NULL,
+    algorithm  INTEGER,
+    feedback   INTEGER,
+    lfo_wave   TEXT,
+    lfo_speed  INTEGER,
+    osc_sync   TEXT,
+    data       BLOB NOT NULL,
+    PRIMARY KEY (file_id, bank, voice)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS voices_name ON voices(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS voices_algorithm ON voices(algorithm, feedback);
+CREATE INDEX IF NOT EXISTS voices_feedback ON voices(feedback);
+CREATE INDEX IF NOT EXISTS voices_lfo_wave ON voices(lfo_wave);
+CREATE INDEX IF NOT EXISTS voices_hash ON voices(hash);
+"""
+
+def voice_rows(file_id, filepath):
+    """Yields one voices row per voice of every bank in a file."""
+    for bank_num, (_, voice_bulk_data) in enumerate(iter_voice_banks(filepath), 1):
+        for i in range(32):
+            voice_data = bytes(voice_bulk_data[i * 128:(i + 1) * 128])
+            full, param = voice_hashes(voice_data)
+            try:
+                params = parse_single_voice(voice_data)
+            except KeyError:
+                # Undecodable LFO wave: keep the voice, leave the parameters empty
+                name = voice_data[118:128].decode('ascii', errors='ignore').strip()
+                yield (file_id, bank_num, i + 1, name, full, param, None, None, None, None, None,
+                       voice_data)
+                continue
+            yield (file_id, bank_num, i + 1, params['name'], full, param, params['algorithm'],
+                   params['feedback'], params['lfo_wave'], params['lfo_speed'], params['osc_sync'],
+                   voice_data)
+
+class Catalog:
+    """The SQLite catalog of all voices of an archive."""
+
+    def __init__(self, path=CATALOG_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, CATALOG_VERSION):
+            raise ValueError(f"'{path}' was written by an incompatible version (schema {version}).")
+        with self.db:
+            self.db.executescript(SCHEMA)
+            self.db.execute(f"PRAGMA user_version={CATALOG_VERSION}")
+
+    def close(self):
+        self.db.close()
+
+    def update(self, filepaths, prune=True, batch=500):
+        """
+        Loads new and modified files, committing every batch files, and if
+        prune is set removes files that no longer exist.
+        Returns (loaded, unchanged, removed).
+        """
+        known = {path: (file_id, size, mtime_ns, digest) for file_id, path, size, mtime_ns, digest
+                 in self.db.execute("SELECT id, path, size, mtime_ns, hash FROM files")}
+        loaded = unchanged = removed = pending = 0
+        cursor = self.db.cursor()
+        cursor.execute("BEGIN")
+        for filepath in filepaths:
+            key = os.path.abspath(filepath)
+            try:
+                st = os.stat(key)
+            except OSError:
+                continue
+            entry = known.get(key)
+            if entry and entry[1] == st.st_size and entry[2] == st.st_mtime_ns:
+                unchanged += 1
+                continue
+            try:
+                digest = file_digest(key)
+            except IOError as e:
+                print(f"Error: Could not read '{filepath}': {e}", file=sys.stderr)
+                continue
+            if entry and entry[3] == digest:
+                cursor.execute("UPDATE files SET size=?, mtime_ns=? WHERE id=?",
+                               (st.st_size, st.st_mtime_ns, entry[0]))
+                unchanged += 1
+                continue
+
+            if entry:
+                file_id = entry[0]
+                cursor.execute("DELETE FROM voices WHERE file_id=?", (file_id,))
+                cursor.execute("UPDATE files SET size=?, mtime_ns=?, hash=? WHERE id=?",
+                               (st.st_size, st.st_mtime_ns, digest, file_id))
+            else:
+                cursor.execute("INSERT INTO files (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                               (key, st.st_size, st.st_mtime_ns, digest))
+                file_id = cursor.lastrowid
+            try:
+                cursor.executemany("INSERT INTO voices VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   voice_rows(file_id, key))
+            except (IOError, ValueError) as e:
+                print(f"Error: Could not read '{filepath}': {e}", file=sys.stderr)
+            loaded += 1
+            pending += 1
+            if pending >= batch:
+                cursor.execute("COMMIT")
+                cursor.execute("BEGIN")
+                pending = 0
+
+        if prune:
+            for key, (file_id, _, _, _) in known.items():
+                if not os.path.exists(key):
+                    cursor.execute("DELETE FROM voices WHERE file_id=?", (file_id,))
+                    cursor.execute("DELETE FROM files WHERE id=?", (file_id,))
+                    removed += 1
+        cursor.execute("COMMIT")
+        return loaded, unchanged, removed
+
+    def query(self, name=None, algorithm=None, feedback=None, lfo_wave=None, voice_hash=None,
+              limit=None):
+        """
+        Yields (path, bank number, voice number, 128 voice bytes) of every
+        voice matching all given filters. name is a case-insensitive LIKE
+        pattern; lfo_wave a name from LFO_WAVES.
+        """
+        clauses, values = [], []
+        for clause, value in (("v.name LIKE ?", name), ("v.algorithm = ?", algorithm),
+                              ("v.feedback = ?", feedback), ("v.lfo_wave = ?", lfo_wave),
+                              ("v.hash = ?", voice_hash)):
+            if value is not None:
+                clauses.append(clause)
+                values.append(value)
+        sql = ("SELECT f.path, v.bank, v.voice, v.data FROM voices v JOIN files f ON f.id = v.file_id" +
+               (" WHERE " + " AND ".join(clauses) if clauses else "") +
+               " ORDER BY f.path, v.bank, v.voice")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        yield from self.db.execute(sql, values)
+
+    def counts(self):
+        """Returns (files, voices) in the catalog."""
+        return (self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0],
+                self.db.execute("SELECT COUNT(*) FROM voices").fetchone()[0])
+
+def lfo_wave_name(value):
+    """Accepts 'square', 'SAW UP', 'saw-up' or a wave number 0-5."""
+    if value.isdigit() and int(value) in LFO_WAVES:
+        return LFO_WAVES[int(value)]
+    wanted = value.upper().replace('-', ' ').replace('_', ' ')
+    if wanted in LFO_WAVES.values():
+        return wanted
+    raise argparse.ArgumentTypeError(
+        f"unknown LFO wave '{value}' (use one of: {', '.join(LFO_WAVES.values())})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds and queries a SQLite catalog of DX7 voices.")
+    parser.add_argument('--catalog', default=CATALOG_FILE,
+                        help=f"catalog database (default: {CATALOG_FILE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    update = commands.add_parser('update', help="load new and modified banks into the catalog")
+    update.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    update.add_argument('--no-prune', action='store_true',
+                        help="keep entries of files that no longer exist")
+
+    query = commands.add_parser('query', help="print the data sheets of matching voices")
+    query.add_argument('--name', help="voice name, case-insensitive; % and _ are wildcards")
+    query.add_argument('--algorithm', type=int, help="algorithm (1-32)")
+    query.add_argument('--feedback', type=int, help="feedback (0-7)")
+    query.add_argument('--lfo-wave', type=lfo_wave_name, help="LFO wave, e.g. square or 'saw up'")
+    query.add_argument('--hash', help="full voice hash as printed by --list")
+    query.add_argument('--limit', type=int, help="stop after this many matches")
+    query.add_argument('--list', action='store_true', help="list the matches instead of rendering them")
+    query.add_argument('-o', '--output', help="write the sheets into this directory instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        catalog = Catalog(args.catalog)
+    except (sqlite3.Error, ValueError) as e:
+        print(f"Error opening the catalog: {e}")
+        sys.exit(1)
+
+    if args.command == 'update':
+        banks, missing = collect_syx_files(args.paths)
+        for path in missing:
+            print(f"Error: File not found: {path}")
+        loaded, unchanged, removed = catalog.update([filepath for filepath, _ in banks],
+                                                    prune=not args.no_prune)
+        files, voices = catalog.counts()
+        print(f"Catalog '{args.catalog}': {loaded} loaded, {unchanged} unchanged, {removed} removed "
+              f"({files} files, {voices} voices).")
+        catalog.close()
+        sys.exit(1 if missing else 0)
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+
+    matches = 0
+    for path, bank_num, voice_num, data in catalog.query(args.name, args.algorithm, args.feedback,
+                                                         args.lfo_wave, args.hash, args.limit):
+        matches += 1
+        bank = f" #{bank_num}" if bank_num > 1 else ""
+        try:
+            params = parse_single_voice(data)
+        except KeyError:
+            print(f"Skipped {os.path.relpath(path)}{bank} #{voice_num:02d}: undecodable LFO wave",
+                  file=sys.stderr)
+            continue
+        if args.list:
+            print(f"  {params['name']:<10}  ALG {params['algorithm']:2d}  FB {params['feedback']}  "
+                  f"{params['lfo_wave']:<8}  {voice_hashes(data)[0]}  "
+                  f"{os.path.relpath(path)}{bank} #{voice_num:02d}")
+            continue
+        sheet = generate_datasheet(params, os.path.basename(path) + bank, voice_num)
+        if args.output:
+            filename = f"{matches:04d}_{sanitize_filename(params['name'])}.txt"
+            with open(os.path.join(args.output, filename), 'w', encoding='utf-8') as f:
+                f.write(sheet)
+        else:
+            print(sheet)
+            print()
+    catalog.close()
+
+    print(f"{matches} matching voices.", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7diff.py
+# Compares DX7 banks voice by voice. Identical banks and voices are found
+# by comparing the raw bytes; only voices that differ are decoded, and
+# their differences are reported per parameter with the labels of the data
+# sheet (OP2 EG RATE 1, OP6 BREAK POINT, ALGORITHM, ...). Voices that only
+# moved to another slot are recognised by their content and reported as
+# moves instead of two changes.
+#
+# python dx7diff.py ROM1A.syx ROM1A_edit.syx    parameter-level report
+# python dx7diff.py ROM1A.syx Archive/          one summary line per bank,
+#                                               most similar banks first
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+
+from dx7sheet_32 import collect_syx_files, iter_voice_banks, parse_single_voice, format_frequency
+
+def operator_fields(op):
+    """(label, display value) pairs of one operator, as on the data sheet."""
+    coarse, fine = format_frequency(op['osc_mode'], op['coarse_val'], op['fine_raw'])
+    return ([(f"EG RATE {i + 1}", op['eg_rate'][i]) for i in range(4)] +
+            [(f"EG LEVEL {i + 1}", op['eg_level'][i]) for i in range(4)] +
+            [("BREAK POINT", op['break_point']), ("LEFT DEPTH", op['l_depth']),
+             ("RIGHT DEPTH", op['r_depth']), ("LEFT CURVE", op['l_curve']),
+             ("RIGHT CURVE", op['r_curve']), ("OSC MODE", op['osc_mode']),
+             ("TUNE", f"{op['tune']:+}"), ("COARSE", coarse), ("FINE", fine),
+             ("RATE SCALING", op['rate_scale']), ("VEL SENS", op['key_vel']),
+             ("AMP MOD SENS", op['amp_mod_sens']), ("OUT LEVEL", op['level'])])
+
+def voice_fields(params):
+    """(label, display value) pairs of a parsed voice, in data sheet order."""
+    fields = [("NAME", params['name']), ("ALGORITHM", params['algorithm']),
+              ("FEEDBACK", params['feedback']), ("OSC SYNC", params['osc_sync']),
+              ("TRANSPOSE", params['transpose'])]
+    for op_num, op in enumerate(params['ops'], 1):
+        fields.extend((f"OP{op_num} {label}", value) for label, value in operator_fields(op))
+    fields.extend([("LFO WAVE", params['lfo_wave']), ("LFO SPEED", params['lfo_speed']),
+                   ("LFO DELAY", params['lfo_delay']), ("LFO SYNC", params['lfo_sync']),
+                   ("PMD", params['lfo_pmd']), ("AMD", params['lfo_amd']),
+                   ("P MOD SENS", params['p_mod_sens'])])
+    fields.extend((f"PITCH EG R{i + 1}", rate) for i, rate in enumerate(params['pitch_eg_rate']))
+    fields.extend((f"PITCH EG L{i + 1}", level) for i, level in enumerate(params['pitch_eg_level']))
+    return fields
+
+def diff_voices(old, new):
+    """
+    Returns (label, old value, new value) for every data sheet field that
+    differs between two 128-byte voices. Changed bytes with bits the data
+    sheet does not show (unused bits, fields it does not decode) are also
+    reported as raw bytes, e.g. ('BYTE 117', 24, 36).
+    """
+    changed = [i for i in range(128) if old[i] != new[i]]
+    try:
+        old_params = parse_single_voice(old)
+        changes = [(label, old_value, new_value) for (label, old_value), (_, new_value)
+                   in zip(voice_fields(old_params), voice_fields(parse_single_voice(new)))
+                   if old_value != new_value]
+    except KeyError:
+        # Out-of-range LFO wave: only the raw bytes can be compared
+        return [(f"BYTE {i}", old[i], new[i]) for i in changed]
+
+    for i in changed:
+        # A bit is hidden if setting it alone leaves the decoded voice unchanged
+        for bit in range(8):
+            if (old[i] ^ new[i]) >> bit & 1:
+                probe = bytearray(old)
+                probe[i] ^= 1 << bit
+                try:
+                    hidden = parse_single_voice(probe) == old_params
+                except KeyError:
+                    hidden = False
+                if hidden:
+                    changes.append((f"BYTE {i}", old[i], new[i]))
+                    break
+    return changes
+
+def voice_slots(voice_bulk_data):
+    """Maps the bytes of every voice of a bank to its first 0-based slot."""
+    slots = {}
+    for i in range(31, -1, -1):
+        slots[bytes(voice_bulk_data[i * 128:(i + 1) * 128])] = i
+    return slots
+
+def voice_name(voice_data):
+    return bytes(voice_data[118:128]).decode('ascii', errors='ignore').strip()
+
+def diff_banks(old, new, old_slots=None, details=True):
+    """
+    Compares two 4096-byte banks. Returns a dict with the number of
+    'unchanged' slots, the 'moved' voices as (old voice number, new voice
+    number, name) and the 'changed' slots as (voice number, old name,
+    new name, changes). changes comes from diff_voices(), or is None when
+    details is off. old_slots is voice_slots(old), for comparing one bank
+    against many.
+    """
+    result = {'unchanged': 0, 'moved': [], 'changed': []}
+    if bytes(old) == bytes(new):
+        result['unchanged'] = 32
+        return result
+    if old_slots is None:
+        old_slots = voice_slots(old)
+
+    for i in range(32):
+        old_voice = bytes(old[i * 128:(i + 1) * 128])
+        new_voice = bytes(new[i * 128:(i + 1) * 128])
+        if old_voice == new_voice:
+            result['unchanged'] += 1
+            continue
+        source = old_slots.get(new_voice)
+        if source is not None:
+            result['moved'].append((source + 1, i + 1, voice_name(new_voice)))
+        else:
+            result['changed'].append((i + 1, voice_name(old_voice), voice_name(new_voice),
+                                      diff_voices(old_voice, new_voice) if details else None))
+    return result
+
+def read_banks(filepath):
+    """Returns the voice data of every bank in a file as a list of bytes."""
+    return [bytes(body) for _, body in iter_voice_banks(filepath)]
+
+def print_report(result):
+    for old_num, new_num, name in result['moved']:
+        print(f"  #{old_num:02d} -> #{new_num:02d}  {name}: moved")
+    for voice_num, old_name, new_name, changes in result['changed']:
+        title = old_name if old_name == new_name else f"{old_name} -> {new_name}"
+        print(f"  #{voice_num:02d}  {title}: {len(changes)} changed")
+        for label, old_value, new_value in changes:
+            print(f"        {label:<20} {old_value!s:>8} -> {new_value!s}")
+    print(f"--- {result['unchanged']} unchanged, {len(result['changed'])} changed, "
+          f"{len(result['moved'])} moved ---")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares DX7 banks parameter by parameter.")
+    parser.add_argument('old', help="bank to compare against")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('--bank', type=int, default=1,
+                        help="bank of OLD within a file with several bulk dumps (default: 1)")
+    parser.add_argument('--details', action='store_true',
+                        help="print the parameter-level report for every bank, not just for one")
+    args = parser.parse_args()
+
+    try:
+        old_banks = read_banks(args.old)
+    except IOError as e:
+        print(f"Error reading the file: {e}")
+        sys.exit(1)
+    if not 1 <= args.bank <= len(old_banks):
+        print(f"Error: '{args.old}' has no bank {args.bank}.")
+        sys.exit(1)
+    old = old_banks[args.bank - 1]
+    old_slots = voice_slots(old)
+    old_key = os.path.abspath(args.old)
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    # One other bank: full report; many: a summary line each
+    details = args.details or len(banks) == 1
+    results = []
+    for filepath, _ in banks:
+        try:
+            new_banks = read_banks(filepath)
+        except IOError as e:
+            print(f"FAILED {filepath}: {e}")
+            continue
+        for bank_num, new in enumerate(new_banks, 1):
+            if os.path.abspath(filepath) == old_key and bank_num == args.bank:
+                continue
+            label = filepath if len(new_banks) == 1 else f"{filepath} #{bank_num}"
+            results.append((label, diff_banks(old, new, old_slots, details)))
+
+    if details:
+        for label, result in results:
+            print(f"{args.old} -> {label}:")
+            print_report(result)
+    else:
+        results.sort(key=lambda item: -(item[1]['unchanged'] + len(item[1]['moved'])))
+        for label, result in results:
+            if result['unchanged'] == 32:
+                print(f"  identical            {label}")
+            else:
+                print(f"  {result['unchanged']:2d} same {len(result['moved']):2d} moved "
+                      f"{len(result['changed']):2d} changed  {label}")
+
+    differ = any(result['unchanged'] < 32 for _, result in results)
+    sys.exit(1 if differ or missing else 0)
+
+if __name__ == '__main__':
+    main()
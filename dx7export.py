@@ -0,0 +1,274 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7export.py
+# Columnar bulk export of every decoded parameter. Streams one row per
+# voice: source file, bank and voice number, name, every per-operator field
+# flattened as op1_eg_rate1 ... op6_coarse_val, and the global and LFO
+# fields, with the values parse_single_voice() decodes.
+#
+# python dx7export.py Archive/ -o voices.csv     CSV
+# python dx7export.py Archive/ -o voices.jsonl   JSON lines
+# python dx7export.py Archive/ -o voices.dx7c    compact binary columnar file
+# python dx7export.py --dump voices.dx7c         prints a .dx7c file as CSV
+#
+# The .dx7c format stores the rows in groups of up to 4096. Within a group
+# every column is one length-prefixed block: numbers as packed int16 or
+# float64 arrays, strings dictionary-encoded. Readers can skip the columns
+# they do not need, and with NumPy numeric columns load without a copy.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import sys
+import csv
+import json
+import struct
+import argparse
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from dx7sheet_32 import collect_syx_files, iter_voice_banks, parse_single_voice
+
+OPERATOR_COLUMNS = (
+    [(f'eg_rate{i}', 'i') for i in range(1, 5)] +
+    [(f'eg_level{i}', 'i') for i in range(1, 5)] +
+    [('break_point', 's'), ('l_depth', 'i'), ('r_depth', 'i'), ('l_curve', 's'), ('r_curve', 's'),
+     ('rate_scale', 'i'), ('tune', 'i'), ('key_vel', 'i'), ('amp_mod_sens', 'i'), ('level', 'i'),
+     ('osc_mode', 's'), ('fine_raw', 'i'), ('coarse_val', 'f')]
+)
+
+GLOBAL_COLUMNS = (
+    [(f'pitch_eg_rate{i}', 'i') for i in range(1, 5)] +
+    [(f'pitch_eg_level{i}', 'i') for i in range(1, 5)] +
+    [('algorithm', 'i'), ('feedback', 'i'), ('osc_sync', 's'), ('lfo_speed', 'i'),
+     ('lfo_delay', 'i'), ('lfo_pmd', 'i'), ('lfo_amd', 'i'), ('lfo_sync', 's'),
+     ('lfo_wave', 's'), ('p_mod_sens', 'i'), ('transpose', 's')]
+)
+
+# (column, type): 'i' integer, 'f' float, 's' string
+COLUMNS = ([('source', 's'), ('bank', 'i'), ('voice', 'i'), ('name', 's')] +
+           [(f"op{op_num}_{name}", kind) for op_num in range(1, 7) for name, kind in OPERATOR_COLUMNS] +
+           GLOBAL_COLUMNS)
+
+COLUMNAR_MAGIC = b'DX7C'
+COLUMNAR_VERSION = 1
+ROW_GROUP_SIZE = 4096
+
+def flatten_voice(params, source, bank_num, voice_num):
+    """Returns the row of one parse_single_voice() dict as a list in COLUMNS order."""
+    row = [source, bank_num, voice_num, params['name']]
+    for op in params['ops']:
+        row.extend(op['eg_rate'])
+        row.extend(op['eg_level'])
+        row.extend([op['break_point'], op['l_depth'], op['r_depth'], op['l_curve'], op['r_curve'],
+                    op['rate_scale'], op['tune'], op['key_vel'], op['amp_mod_sens'], op['level'],
+                    op['osc_mode'], op['fine_raw'], op['coarse_val']])
+    row.extend(params['pitch_eg_rate'])
+    row.extend(params['pitch_eg_level'])
+    row.extend([params['algorithm'], params['feedback'], params['osc_sync'], params['lfo_speed'],
+                params['lfo_delay'], params['lfo_pmd'], params['lfo_amd'], params['lfo_sync'],
+                params['lfo_wave'], params['p_mod_sens'], params['transpose']])
+    return row
+
+def iter_rows(filepaths):
+    """Yields one row per voice of every bank in the given files."""
+    for filepath in filepaths:
+        try:
+            for bank_num, (_, voice_bulk_data) in enumerate(iter_voice_banks(filepath), 1):
+                for i in range(32):
+                    try:
+                        params = parse_single_voice(voice_bulk_data[i * 128:(i + 1) * 128])
+                    except KeyError:
+                        print(f"Skipped {filepath} #{i + 1:02d}: undecodable LFO wave", file=sys.stderr)
+                        continue
+                    yield flatten_voice(params, filepath, bank_num, i + 1)
+        except (IOError, ValueError) as e:
+            print(f"FAILED {filepath}: {e}", file=sys.stderr)
+
+# --- Writers ---
+
+class CsvWriter:
+    def __init__(self, f):
+        self.writer = csv.writer(f)
+        self.writer.writerow([name for name, _ in COLUMNS])
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        pass
+
+class JsonlWriter:
+    def __init__(self, f):
+        self.f = f
+        self.names = [name for name, _ in COLUMNS]
+
+    def write(self, row):
+        self.f.write(json.dumps(dict(zip(self.names, row))) + "\n")
+
+    def close(self):
+        pass
+
+def _encode_column(kind, values):
+    if kind == 'i':
+        return array('h', values).tobytes()
+    if kind == 'f':
+        return array('d', values).tobytes()
+    # Strings: dictionary of distinct values, then one uint16 code per row
+    codes = {}
+    indexes = array('H', [codes.setdefault(value, len(codes)) for value in values])
+    parts = [struct.pack('<H', len(codes))]
+    for value in codes:
+        data = value.encode('utf-8')
+        parts.append(struct.pack('<H', len(data)) + data)
+    parts.append(indexes.tobytes())
+    return b"".join(parts)
+
+class ColumnarWriter:
+    """Writes rows in groups of ROW_GROUP_SIZE; only one group is held in memory."""
+
+    def __init__(self, f):
+        self.f = f
+        header = json.dumps({'version': COLUMNAR_VERSION, 'columns': COLUMNS,
+                             'byteorder': sys.byteorder}).encode('utf-8')
+        f.write(COLUMNAR_MAGIC + struct.pack('<I', len(header)) + header)
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        self.f.write(struct.pack('<I', len(self.rows)))
+        for index, (_, kind) in enumerate(COLUMNS):
+            block = _encode_column(kind, [row[index] for row in self.rows])
+            self.f.write(struct.pack('<I', len(block)) + block)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+
+def export(filepaths, output_path, fmt=None):
+    """Streams every voice of the given files into output_path; returns the row count."""
+    fmt = fmt or output_path.rsplit('.', 1)[-1].lower()
+    if fmt == 'dx7c':
+        f = open(output_path, 'wb')
+        writer = ColumnarWriter(f)
+    elif fmt in ('csv', 'jsonl'):
+        f = open(output_path, 'w', encoding='utf-8', newline='')
+        writer = CsvWriter(f) if fmt == 'csv' else JsonlWriter(f)
+    else:
+        raise ValueError(f"Unknown export format '{fmt}' (use csv, jsonl or dx7c).")
+
+    count = 0
+    with f:
+        for row in iter_rows(filepaths):
+            writer.write(row)
+            count += 1
+        writer.close()
+    return count
+
+# --- Reader ---
+
+def _decode_column(kind, block, rows, byteorder):
+    if kind in 'if':
+        typecode = 'h' if kind == 'i' else 'd'
+        if np is not None:
+            dtype = np.dtype(typecode).newbyteorder('<' if byteorder == 'little' else '>')
+            return np.frombuffer(block, dtype=dtype)
+        values = array(typecode)
+        values.frombytes(block)
+        if byteorder != sys.byteorder:
+            values.byteswap()
+        return values
+
+    distinct, = struct.unpack_from('<H', block, 0)
+    offset = 2
+    dictionary = []
+    for _ in range(distinct):
+        size, = struct.unpack_from('<H', block, offset)
+        dictionary.append(block[offset + 2:offset + 2 + size].decode('utf-8'))
+        offset += 2 + size
+    codes = array('H')
+    codes.frombytes(block[offset:offset + rows * 2])
+    if byteorder != sys.byteorder:
+        codes.byteswap()
+    return [dictionary[code] for code in codes]
+
+def read_columnar(path, columns=None):
+    """
+    Yields one dict of columns per row group of a .dx7c file, limited to the
+    given column names. Numeric columns are NumPy arrays when NumPy is
+    installed, array.array otherwise; string columns are lists.
+    """
+    with open(path, 'rb') as f:
+        if f.read(4) != COLUMNAR_MAGIC:
+            raise ValueError(f"'{path}' is not a .dx7c file.")
+        header_size, = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(header_size).decode('utf-8'))
+        layout = header['columns']
+        wanted = set(columns) if columns else {name for name, _ in layout}
+
+        while True:
+            count = f.read(4)
+            if len(count) < 4:
+                break
+            rows, = struct.unpack('<I', count)
+            group = {}
+            for name, kind in layout:
+                size, = struct.unpack('<I', f.read(4))
+                if name in wanted:
+                    group[name] = _decode_column(kind, f.read(size), rows, header['byteorder'])
+                else:
+                    f.seek(size, 1)
+            yield group
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Exports every decoded DX7 voice parameter as one row per voice.")
+    parser.add_argument('paths', nargs='*', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('-o', '--output', help="output file: .csv, .jsonl or .dx7c")
+    parser.add_argument('--format', choices=['csv', 'jsonl', 'dx7c'],
+                        help="output format (default: taken from the file extension)")
+    parser.add_argument('--dump', metavar='FILE', help="print a .dx7c file as CSV and exit")
+    args = parser.parse_args()
+
+    if args.dump:
+        writer = csv.writer(sys.stdout)
+        header = True
+        for group in read_columnar(args.dump):
+            if header:
+                writer.writerow(group)
+                header = False
+            writer.writerows(zip(*(group[name] for name in group)))
+        return
+
+    if not args.paths or not args.output:
+        parser.error("PATH and --output are required for an export")
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}", file=sys.stderr)
+
+    try:
+        count = export([filepath for filepath, _ in banks], args.output, args.format)
+    except (IOError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Exported {count} voices from {len(banks)} files to '{args.output}'.")
+    sys.exit(1 if missing else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7formats.py
+# Format registry. Every file is classified from its size and a bounded
+# head read: the first 64 KB are searched for a DX7 bank or single-voice
+# header, so files too small to hold DX7 data are skipped without being read
+# and files of other makers are skipped after their head. Also decodes single-voice dumps (VCED: 155 unpacked parameters,
+# 163 bytes with header, checksum and F7) into the same params structure
+# that parse_single_voice() returns, so they get the usual data sheet.
+#
+# python dx7formats.py Archive/            counts the files of every format
+# python dx7formats.py Archive/ --list     one line per file
+#
+# Batch mode (dx7sheet_32.py) probes every file before converting it: files
+# with a bank header are scanned for banks as before, single voices are
+# converted into one sheet named after the voice, and all other files are
+# reported. Captures whose first DX7 message lies beyond the head are only
+# found with --scan-captures, which scans every such file in full.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import argparse
+
+from dx7stats import NULL_STATS
+from dx7sheet_32 import (NOTE_NAMES, CURVE_MODES, LFO_WAVES, FIXED_FREQ_MAP, SYSEX_SIZE,
+                         collect_syx_files, render_datasheet, sanitize_filename, file_digest,
+                         remove_outputs)
+
+PROBE_SIZE = 64 * 1024
+VCED_SIZE = 163
+
+class Format:
+    """
+    A registered file format. header is a regex searched for in the first
+    PROBE_SIZE bytes, min_size the smallest file that can hold the format.
+    kind is 'bank' for files scanned for 32-voice bulk dumps, 'voice' for
+    files searched for a single-voice dump and None for formats that cannot
+    be converted. Capture formats only match when captures are scanned.
+    """
+    __slots__ = ('name', 'description', 'header', 'min_size', 'kind', 'capture')
+
+    def __init__(self, name, description, header, min_size, kind, capture=False):
+        self.name = name
+        self.description = description
+        self.header = re.compile(header, re.DOTALL)
+        self.min_size = min_size
+        self.kind = kind
+        self.capture = capture
+
+    def matches(self, head, size, scan_captures=False):
+        if size < self.min_size or (self.capture and not scan_captures):
+            return False
+        return self.header.search(head) is not None
+
+    def __repr__(self):
+        return f"Format({self.name!r})"
+
+FORMATS = []
+
+def register_format(name, description, header, min_size=0, kind=None, capture=False):
+    """Adds a format; formats are tried in the order they were registered."""
+    fmt = Format(name, description, header, min_size, kind, capture)
+    FORMATS.append(fmt)
+    return fmt
+
+VCED_HEADER = rb'\xf0\x43[\x00-\x0f]\x00\x01\x1b'
+
+register_format('dx7-bank', "DX7 32-voice bulk dump", rb'\xf0\x43[\x00-\x0f]\x09\x20\x00',
+                SYSEX_SIZE, 'bank')
+register_format('dx7-voice', "DX7 single voice (VCED)", VCED_HEADER, VCED_SIZE, 'voice')
+# SysEx of another maker; 7D-7F are the non-commercial and universal IDs
+register_format('other-sysex', "SysEx of another manufacturer", rb'\A\xf0[^\x43\x7d-\x7f]')
+# A file no larger than the head has been searched in full already
+register_format('capture', "larger than the probed head, scanned for banks (--scan-captures)",
+                rb'', PROBE_SIZE + 1, 'bank', capture=True)
+
+TOO_SMALL = Format('too-small', "too small for a bank or a single voice", rb'', 0, None)
+UNKNOWN = Format('unknown', "no DX7 header near the start", rb'', 0, None)
+
+def probe(filepath, scan_captures=False):
+    """
+    Classifies a file from its size and the first PROBE_SIZE bytes; files
+    too small for a single voice are not read. Returns a Format.
+    """
+    with open(filepath, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < VCED_SIZE:
+            return TOO_SMALL
+        head = f.read(PROBE_SIZE)
+    for fmt in FORMATS:
+        if fmt.matches(head, size, scan_captures):
+            return fmt
+    return UNKNOWN
+
+# --- Single voice (VCED) ---
+
+# Highest value of each of the 21 parameters of an operator (OP6 first) and
+# of the 24 global parameters after them; the 10 name bytes follow.
+VCED_OPERATOR_MAX = [99] * 8 + [99, 99, 99, 3, 3, 7, 3, 7, 99, 1, 31, 99, 14]
+VCED_GLOBAL_MAX = [99] * 8 + [31, 7, 1, 99, 99, 99, 99, 1, 5, 7, 48]
+VCED_MAX = VCED_OPERATOR_MAX * 6 + VCED_GLOBAL_MAX + [127] * 10
+
+def vced_checksum(data):
+    return -sum(data) & 0x7F
+
+def parse_vced_voice(data, lenient=False):
+    """
+    Parses the 155 parameter bytes of a single-voice dump into the structure
+    of parse_single_voice(). Unlike the packed format, VCED carries feedback
+    and transpose as plain parameters, and both are decoded.
+    Raises ValueError for out-of-range values unless lenient is set, in
+    which case they are clamped.
+    """
+    values = list(data[:155])
+    for i, (value, maximum) in enumerate(zip(values, VCED_MAX)):
+        if value > maximum:
+            if not lenient:
+                raise ValueError(f"parameter {i} = {value} is out of range (0-{maximum})")
+            values[i] = maximum
+
+    params = {'ops': []}
+    for i in range(6):
+        op_data = values[i * 21:(i + 1) * 21]
+        op = {}
+        op['eg_rate'] = op_data[0:4]
+        op['eg_level'] = op_data[4:8]
+        op['break_point'] = NOTE_NAMES[op_data[8]]
+        op['l_depth'] = op_data[9]
+        op['r_depth'] = op_data[10]
+        op['l_curve'] = CURVE_MODES[op_data[11]]
+        op['r_curve'] = CURVE_MODES[op_data[12]]
+        op['rate_scale'] = op_data[13]
+        op['amp_mod_sens'] = op_data[14]
+        op['key_vel'] = op_data[15]
+        op['level'] = op_data[16]
+        op['osc_mode'] = 'FIX' if op_data[17] else 'RATIO'
+        coarse_byte = op_data[18]
+        op['fine_raw'] = op_data[19]
+        op['tune'] = op_data[20] - 7
+
+        if op['osc_mode'] == 'RATIO':
+            op['coarse_val'] = 0.5 if coarse_byte == 0 else float(coarse_byte)
+        else:
+            op['coarse_val'] = FIXED_FREQ_MAP[coarse_byte & 3]
+
+        params['ops'].append(op)
+
+    params['ops'].reverse()
+
+    params['pitch_eg_rate'] = values[126:130]
+    params['pitch_eg_level'] = values[130:134]
+    params['algorithm'] = values[134] + 1
+    params['feedback'] = values[135]
+    params['osc_sync'] = 'ON' if values[136] else 'OFF'
+    params['lfo_speed'] = values[137]
+    params['lfo_delay'] = values[138]
+    params['lfo_pmd'] = values[139]
+    params['lfo_amd'] = values[140]
+    params['lfo_sync'] = 'ON' if values[141] else 'OFF'
+    params['lfo_wave'] = LFO_WAVES[values[142]]
+    params['p_mod_sens'] = values[143]
+    params['transpose'] = NOTE_NAMES[values[144] + 15]  # 0 = C1, 24 = C3
+    params['name'] = bytes(values[145:155]).decode('ascii', errors='ignore').strip()
+    return params
+
+def read_vced(filepath, lenient=False):
+    """
+    Reads the first single-voice dump in the first PROBE_SIZE bytes of a
+    file and returns its parsed params. Raises ValueError if there is
+    none, or it is truncated, not terminated by F7 or has a bad checksum
+    (the checksum is not checked when lenient is set).
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read(PROBE_SIZE + VCED_SIZE)
+    found = re.search(VCED_HEADER, data)
+    if found is None:
+        raise ValueError("This does not appear to be a valid Yamaha DX7 SysEx file.")
+    message = data[found.start():found.start() + VCED_SIZE]
+    if len(message) < VCED_SIZE:
+        raise ValueError("The single-voice dump is truncated.")
+    if message[-1] != 0xF7:
+        raise ValueError("The SysEx message is not terminated by F7.")
+    data = message[6:161]
+    if not lenient and message[161] != vced_checksum(data):
+        raise ValueError(f"checksum mismatch (stored 0x{message[161]:02X}, computed "
+                         f"0x{vced_checksum(data):02X}), use --lenient to convert it anyway")
+    return parse_vced_voice(data, lenient)
+
+def convert_voice_file(filepath, output_dir, verbose=False, root=None, previous=None,
+                       stats=NULL_STATS, sheets=None, lenient=False):
+    """
+    Converts a single-voice dump into one sheet named after the voice in
+    output_dir. Returns (written, errors, manifest entry or None), like
+    convert_file(). With root, the build is incremental: previous is the
+    manifest entry of the last run and an unchanged file is not converted.
+    """
+    digest = None
+    if root is not None:
+        with stats.stage('hash'):
+            digest = file_digest(filepath)
+        bank_dir = os.path.relpath(output_dir, root)
+        if (previous and previous['hash'] == digest and previous['dir'] == bank_dir
+                and previous.get('lenient', False) == lenient
+                and all(os.path.exists(os.path.join(root, relpath)) for relpath in previous['outputs'])):
+            if verbose:
+                print("Voice is unchanged, the data sheet is up to date.")
+            return 0, [], previous
+
+    with stats.stage('read_validate'):
+        params = read_vced(filepath, lenient)
+    stats.count('voices')
+    with stats.stage('render'):
+        datasheet = render_datasheet(params, os.path.basename(filepath), 1)
+    full_path = os.path.join(output_dir, f"{sanitize_filename(params['name']) or 'voice'}.txt")
+
+    if sheets is not None:
+        sheets.append((full_path, datasheet))
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+        with stats.stage('write'):
+            with open(full_path, 'w', encoding='utf-8') as f:
+                stats.count('bytes_written', f.write(datasheet))
+        if verbose:
+            print(f"  (01/01) Saved: '{full_path}'")
+    stats.count('sheets')
+
+    if root is None:
+        return 1, [], None
+    relpath = os.path.relpath(full_path, root)
+    if previous:
+        remove_outputs(root, [old for old in previous['outputs'] if old != relpath])
+    entry = {'hash': digest, 'skip': [], 'dir': bank_dir, 'lenient': lenient,
+             'outputs': {relpath: digest}}
+    return 1, [], entry
+
+def classify(filepaths, scan_captures=False):
+    """Yields (filepath, Format) for every file; unreadable files get None."""
+    for filepath in filepaths:
+        try:
+            yield filepath, probe(filepath, scan_captures)
+        except OSError:
+            yield filepath, None
+
+def main():
+    parser = argparse.ArgumentParser(description="Classifies .syx files by their header.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('--list', action='store_true', help="print the format of every file")
+    parser.add_argument('--scan-captures', action='store_true',
+                        help="count files without a DX7 header near the start as captures to scan")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    counts = {}
+    for filepath, fmt in classify((filepath for filepath, _ in banks), args.scan_captures):
+        name = fmt.name if fmt is not None else 'unreadable'
+        counts[name] = counts.get(name, 0) + 1
+        if args.list:
+            print(f"{name:<14} {filepath}")
+
+    if args.list:
+        print()
+    descriptions = {fmt.name: fmt.description for fmt in FORMATS + [TOO_SMALL, UNKNOWN]}
+    for name, count in sorted(counts.items(), key=lambda item: -item[1]):
+        print(f"{count:>8}  {name:<14} {descriptions.get(name, 'could not be opened')}")
+    print(f"--- Classified {len(banks)} files. ---")
+    sys.exit(1 if missing else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7index.py
+# Content-addressed voice index. Every 128-byte voice is hashed twice: over
+# all bytes, and over the parameter bytes 0-117 only (without the name).
+# Equal full hashes are exact duplicates; equal parameter hashes with
+# different names are the same sound under another name.
+#
+# The index is stored as JSON and updated incrementally: files whose size
+# and modification time are unchanged are not read again. It is written to
+# a temporary file that replaces the old one, and an index that cannot be
+# read is rebuilt.
+#
+# python dx7index.py Archive/               updates .dx7index.json and prints
+#                                           the duplicate report
+# python dx7sheet_32.py --dedup Archive/    skips sheets of exact duplicates
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+
+from dx7sheet_32 import collect_syx_files, iter_voice_banks
+
+INDEX_FILE = ".dx7index.json"
+INDEX_VERSION = 1
+
+def voice_hashes(voice_data):
+    """Returns (full hash, parameter hash) of a 128-byte voice as hex strings."""
+    full = hashlib.blake2b(voice_data, digest_size=8).hexdigest()
+    param = hashlib.blake2b(voice_data[:118], digest_size=8).hexdigest()
+    return full, param
+
+def index_file(filepath):
+    """Hashes every voice of every 32-voice bank in a file."""
+    banks = []
+    for _, voice_bulk_data in iter_voice_banks(filepath):
+        voices = []
+        for i in range(0, 4096, 128):
+            voice_data = voice_bulk_data[i:i+128]
+            name = bytes(voice_data[118:128]).decode('ascii', errors='ignore').strip()
+            voices.append([name, *voice_hashes(voice_data)])
+        banks.append(voices)
+    return banks
+
+class VoiceIndex:
+    """
+    Maps each indexed file to its size, mtime and per-bank list of
+    [name, full hash, parameter hash] entries for the 32 voices.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.files = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data['version'] == INDEX_VERSION:
+                self.files = dict(data['files'])
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError):
+            # A damaged index is discarded and rebuilt from the files
+            self.files = {}
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'files': self.files}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def update(self, filepaths, prune=True):
+        """
+        Indexes new and modified files and, if prune is set, drops entries of
+        files that no longer exist. Returns (indexed, unchanged, removed).
+        """
+        indexed = unchanged = removed = 0
+        for filepath in filepaths:
+            key = os.path.abspath(filepath)
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                continue
+            entry = self.files.get(key)
+            if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+                unchanged += 1
+                continue
+            try:
+                banks = index_file(filepath)
+            except (IOError, ValueError):
+                banks = []
+            self.files[key] = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'banks': banks}
+            indexed += 1
+
+        if prune:
+            for key in [key for key in self.files if not os.path.exists(key)]:
+                del self.files[key]
+                removed += 1
+
+        return indexed, unchanged, removed
+
+    def voices(self, filepaths=None):
+        """
+        Yields (path, bank number, voice number, name, full hash, param hash)
+        in sorted path order, optionally limited to the given files.
+        """
+        keys = sorted(self.files) if filepaths is None else sorted(
+            os.path.abspath(filepath) for filepath in filepaths if os.path.abspath(filepath) in self.files)
+        for key in keys:
+            for bank_num, voices in enumerate(self.files[key]['banks'], 1):
+                for voice_num, (name, full, param) in enumerate(voices, 1):
+                    yield key, bank_num, voice_num, name, full, param
+
+    def exact_duplicates(self):
+        """Groups of voices that are byte-identical, name included."""
+        groups = {}
+        for entry in self.voices():
+            groups.setdefault(entry[4], []).append(entry)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def renamed_duplicates(self):
+        """Groups of voices with identical parameters but more than one name."""
+        groups = {}
+        for entry in self.voices():
+            groups.setdefault(entry[5], []).append(entry)
+        return [group for group in groups.values() if len({entry[3] for entry in group}) > 1]
+
+    def duplicate_skips(self, filepaths):
+        """
+        For the given files, returns {abspath: {(bank number, voice number)}}
+        of every voice that is an exact duplicate of one seen earlier in
+        sorted order, so its sheet needs to be generated only once.
+        """
+        seen = set()
+        skips = {}
+        for key, bank_num, voice_num, _, full, _ in self.voices(filepaths):
+            if full in seen:
+                skips.setdefault(key, set()).add((bank_num, voice_num))
+            else:
+                seen.add(full)
+        return skips
+
+def print_group(group):
+    for key, bank_num, voice_num, name, _, _ in group:
+        bank = f" bank {bank_num}" if bank_num > 1 else ""
+        print(f"    {os.path.relpath(key)}{bank} #{voice_num:02d}: {name}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Indexes DX7 voices by content hash and reports duplicates.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('--index', default=INDEX_FILE,
+                        help=f"index file (default: {INDEX_FILE})")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    index = VoiceIndex(args.index)
+    indexed, unchanged, removed = index.update([filepath for filepath, _ in banks])
+    index.save()
+    print(f"Index '{args.index}': {indexed} files indexed, {unchanged} unchanged, {removed} removed.")
+
+    exact = index.exact_duplicates()
+    renamed = index.renamed_duplicates()
+
+    print(f"\n--- Exact duplicates: {len(exact)} ---")
+    for group in exact:
+        print(f"  {group[0][3]} ({len(group)} copies)")
+        print_group(group)
+
+    print(f"\n--- Same sound, different name: {len(renamed)} ---")
+    for group in renamed:
+        print(f"  {' / '.join(sorted({entry[3] for entry in group}))}")
+        print_group(group)
+
+    sys.exit(1 if missing else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7jobs.py
+# Resumable, sharded batch conversion for very large archives. The file
+# list is split into deterministic shards by a hash of each file's path
+# relative to the given directories, so several machines or containers can
+# each convert one shard of the same archive into a shared output folder.
+# Every completed bank is appended to a journal in the output folder, and
+# a restarted run skips the banks the journal lists as done. Banks that
+# fail are put on a quarantine list instead of stopping the run.
+#
+# python dx7jobs.py Archive/ -o Sheet/ -j 0                whole archive
+# python dx7jobs.py Archive/ -o Sheet/ --shard 2/8         second of eight shards
+# python dx7jobs.py Archive/ -o Sheet/ --retry-quarantined converts quarantined banks again
+#
+# Journal records are written in groups (--checkpoint). Each worker fsyncs
+# the sheets and directories of its bank before reporting it done, and the
+# journal itself is fsync'd, so a bank the journal lists as done survives a
+# crash, an OOM kill or a reboot. A bank that was being converted when the run
+# stopped is simply converted again. A bank is converted again when its
+# file changed since it was journaled.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dx7sheet_32 import collect_syx_files, convert_file
+
+JOURNAL_FILE = ".dx7jobs-{index}-of-{count}.jsonl"
+QUARANTINE_FILE = "quarantine-{index}-of-{count}.txt"
+
+def shard_of(relname, count):
+    """Returns the 0-based shard of a file, the same on every machine and OS."""
+    digest = hashlib.blake2b(relname.replace(os.sep, '/').encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count
+
+def parse_shard(text):
+    """argparse type for --shard: 'i/n' with 1 <= i <= n, returned as (i, n)."""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not of the form i/n, e.g. 2/8")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {index} does not exist in {count} shards")
+    return index, count
+
+def file_state(filepath):
+    st = os.stat(filepath)
+    return st.st_size, st.st_mtime_ns
+
+class Journal:
+    """
+    Append-only JSON lines log of finished banks. Records are buffered and
+    written with commit(); load() returns the last record per file.
+    """
+
+    def __init__(self, path, quarantine_path):
+        self.path = path
+        self.quarantine_path = quarantine_path
+        self.pending = []
+
+    def load(self):
+        records = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # line cut short by a crash
+                    records[record['source']] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def add(self, record):
+        self.pending.append(record)
+
+    def commit(self):
+        """Appends and fsyncs the pending records."""
+        if not self.pending:
+            return
+        created = not os.path.exists(self.path)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("".join(json.dumps(record) + "\n" for record in self.pending))
+            f.flush()
+            os.fsync(f.fileno())
+        if created:
+            fsync_directory(os.path.dirname(self.path))
+        quarantined = [record for record in self.pending if record['status'] == 'quarantined']
+        if quarantined:
+            with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+                f.write("".join(f"{record['source']}\t{record['error']}\n" for record in quarantined))
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending = []
+
+def is_done(record, state, lenient, retry_quarantined):
+    if record is None or [record['size'], record['mtime_ns']] != list(state):
+        return False
+    if record['status'] == 'quarantined':
+        return not retry_quarantined
+    return record['lenient'] == lenient
+
+def fsync_directory(directory):
+    # Makes new entries of a directory durable; not possible on every OS
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def sync_bank(bank_dir, root):
+    """
+    fsyncs the sheets of one bank: the files in bank_dir and in its bankNN
+    subdirectories, those directories, and the directories up to root.
+    """
+    directories = [bank_dir] + [os.path.join(bank_dir, name) for name in os.listdir(bank_dir)
+                                if re.fullmatch(r'bank\d\d+', name)]
+    for directory in directories:
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                with open(entry.path, 'rb') as f:
+                    os.fsync(f.fileno())
+        fsync_directory(directory)
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(bank_dir))
+    while directory.startswith(root):
+        fsync_directory(directory)
+        directory = os.path.dirname(directory)
+
+def _convert_job(filepath, output_dir, lenient, root, scan_captures=False):
+    # Worker entry point: returns (written, error message or None), never raises.
+    try:
+        written, errors, _ = convert_file(filepath, output_dir, lenient=lenient,
+                                          scan_captures=scan_captures)
+        if not errors:
+            sync_bank(output_dir, root)
+    except (IOError, ValueError) as e:
+        return 0, str(e)
+    return written, '; '.join(errors) or None
+
+def run_jobs(banks, output_dir, journal, jobs=1, lenient=False, retry_quarantined=False,
+             checkpoint=50, checkpoint_seconds=10.0, scan_captures=False):
+    """
+    Converts the (filepath, relname) banks that the journal does not list as
+    done, each into its own subdirectory of output_dir, and journals every
+    finished bank. Returns (converted, quarantined, skipped).
+    """
+    done = journal.load()
+    todo = []
+    skipped = 0
+    for filepath, relname in banks:
+        try:
+            state = file_state(filepath)
+        except OSError:
+            state = None
+        key = relname.replace(os.sep, '/')
+        if state is not None and is_done(done.get(key), state, lenient, retry_quarantined):
+            skipped += 1
+        else:
+            todo.append((filepath, key, state))
+
+    total = len(todo)
+    converted = quarantined = 0
+    last_commit = time.monotonic()
+
+    def report(count, task, written, error):
+        nonlocal converted, quarantined, last_commit
+        filepath, key, state = task
+        record = {'source': key, 'size': state[0] if state else None,
+                  'mtime_ns': state[1] if state else None, 'lenient': lenient, 'sheets': written,
+                  'status': 'quarantined' if error else 'ok'}
+        if error:
+            record['error'] = error
+            quarantined += 1
+            print(f"[{count:>{len(str(total))}}/{total}] QUARANTINED {filepath}: {error}")
+        else:
+            converted += 1
+            print(f"[{count:>{len(str(total))}}/{total}] OK     {filepath} ({written} sheets)")
+        journal.add(record)
+        if (len(journal.pending) >= checkpoint
+                or time.monotonic() - last_commit >= checkpoint_seconds):
+            journal.commit()
+            last_commit = time.monotonic()
+
+    def target(task):
+        return os.path.join(output_dir, os.path.splitext(task[1])[0])
+
+    try:
+        if jobs == 1:
+            for count, task in enumerate(todo, 1):
+                report(count, task, *_convert_job(task[0], target(task), lenient, output_dir,
+                                                  scan_captures))
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = {executor.submit(_convert_job, task[0], target(task), lenient, output_dir,
+                                           scan_captures): task
+                           for task in todo}
+                try:
+                    for count, future in enumerate(as_completed(futures), 1):
+                        report(count, futures[future], *future.result())
+                except BaseException:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+    finally:
+        journal.commit()
+    return converted, quarantined, skipped
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Converts a DX7 archive in resumable shards, journaling every finished bank.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('-o', '--output', default="Sheet", help="output directory (default: Sheet)")
+    parser.add_argument('--shard', type=parse_shard, default=(1, 1), metavar='i/n',
+                        help="convert only the i-th of n shards of the file list (default: 1/1)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of worker processes, 0 = one per CPU core (default: 1)")
+    parser.add_argument('--lenient', action='store_true',
+                        help="convert banks with a bad checksum, clamping out-of-range values")
+    parser.add_argument('--scan-captures', action='store_true',
+                        help="scan files without a DX7 header in their first 64 KB for banks in full")
+    parser.add_argument('--retry-quarantined', action='store_true',
+                        help="convert the banks on the quarantine list again")
+    parser.add_argument('--checkpoint', type=int, default=50,
+                        help="banks per journal write; at most 10s apart (default: 50)")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    index, count = args.shard
+    banks = [(filepath, relname) for filepath, relname in banks if shard_of(relname, count) == index - 1]
+    if not banks:
+        print(f"Error: No .syx files found in shard {index}/{count}.")
+        sys.exit(1)
+
+    try:
+        os.makedirs(args.output, exist_ok=True)
+    except OSError as e:
+        print(f"Error creating '{args.output}': {e}")
+        sys.exit(1)
+    names = {'index': index, 'count': count}
+    journal = Journal(os.path.join(args.output, JOURNAL_FILE.format(**names)),
+                      os.path.join(args.output, QUARANTINE_FILE.format(**names)))
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    print("--- DX7 Voice Data Sheet Generator (Job Runner) ---")
+    print(f"Shard {index}/{count}: {len(banks)} banks, converting with {jobs} worker(s) "
+          f"into '{args.output}/'.")
+    try:
+        converted, quarantined, skipped = run_jobs(
+            banks, args.output, journal, jobs, args.lenient, args.retry_quarantined,
+            max(1, args.checkpoint), scan_captures=args.scan_captures)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Finished banks are journaled; run the same command again to resume.")
+        sys.exit(1)
+
+    print(f"\n--- Converted {converted} banks, {skipped} already done, {quarantined} quarantined. ---")
+    if quarantined:
+        print(f"Quarantine list: {journal.quarantine_path}")
+    sys.exit(1 if quarantined or missing else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7model.py
+# Compact Voice/Operator objects for keeping whole archives in memory.
+# Both classes use __slots__ and store the raw integer fields only; display
+# strings such as 'FIX'/'RATIO', curve names or note names are decoded on
+# access. Indexing with the parse_single_voice() keys (voice['ops'],
+# op['eg_rate'], ...) returns the same values as the dict form, so
+# generate_datasheet() accepts a Voice unchanged.
+#
+# Bank wraps the voice data of a whole bulk dump and decodes names and
+# voices lazily, on first access.
+#
+# python dx7model.py ROM1A.syx   prints a memory comparison against the
+#                                dicts returned by parse_single_voice()
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import argparse
+import tracemalloc
+
+from dx7sheet_32 import (NOTE_NAMES, CURVE_MODES, LFO_WAVES, FIXED_FREQ_MAP,
+                         collect_syx_files, iter_buffer_frames, iter_voice_banks, is_voice_bulk_frame,
+                         parse_single_voice)
+
+class Operator:
+    """One of the six operators of a voice, decoded from its 17-byte block."""
+
+    __slots__ = ('eg_rate1', 'eg_rate2', 'eg_rate3', 'eg_rate4',
+                 'eg_level1', 'eg_level2', 'eg_level3', 'eg_level4',
+                 'break_point_raw', 'l_depth', 'r_depth', 'l_curve_raw', 'r_curve_raw',
+                 'rate_scale', 'tune', 'key_vel', 'amp_mod_sens', 'level',
+                 'osc_mode_raw', 'coarse_raw', 'fine_raw')
+
+    # Keys of the operator dicts built by parse_single_voice()
+    KEYS = ('eg_rate', 'eg_level', 'break_point', 'l_depth', 'r_depth', 'l_curve', 'r_curve',
+            'rate_scale', 'tune', 'key_vel', 'amp_mod_sens', 'level', 'osc_mode',
+            'fine_raw', 'coarse_val')
+
+    @classmethod
+    def from_bytes(cls, op_data):
+        op = cls.__new__(cls)
+        (op.eg_rate1, op.eg_rate2, op.eg_rate3, op.eg_rate4,
+         op.eg_level1, op.eg_level2, op.eg_level3, op.eg_level4) = op_data[0:8]
+        op.break_point_raw = op_data[8]
+        op.l_depth = op_data[9]
+        op.r_depth = op_data[10]
+        op.l_curve_raw = op_data[11] & 3
+        op.r_curve_raw = (op_data[11] >> 2) & 3
+        op.rate_scale = op_data[12] & 0x07
+        op.tune = ((op_data[12] & 120) >> 3) - 7
+        op.key_vel = (op_data[13] >> 2) & 0x07
+        op.amp_mod_sens = op_data[13] & 0x03
+        op.level = op_data[14]
+        op.osc_mode_raw = op_data[15] & 1
+        op.coarse_raw = op_data[15] >> 1
+        op.fine_raw = op_data[16]
+        return op
+
+    @property
+    def eg_rate(self):
+        return [self.eg_rate1, self.eg_rate2, self.eg_rate3, self.eg_rate4]
+
+    @property
+    def eg_level(self):
+        return [self.eg_level1, self.eg_level2, self.eg_level3, self.eg_level4]
+
+    @property
+    def break_point(self):
+        return NOTE_NAMES[self.break_point_raw] if 0 <= self.break_point_raw <= 99 else 'N/A'
+
+    @property
+    def l_curve(self):
+        return CURVE_MODES[self.l_curve_raw]
+
+    @property
+    def r_curve(self):
+        return CURVE_MODES[self.r_curve_raw]
+
+    @property
+    def osc_mode(self):
+        return 'FIX' if self.osc_mode_raw else 'RATIO'
+
+    @property
+    def coarse_val(self):
+        if not self.osc_mode_raw:
+            return 0.5 if self.coarse_raw == 0 else float(self.coarse_raw)
+        return FIXED_FREQ_MAP.get(self.coarse_raw & 3, 1.0)
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.KEYS}
+
+    def __repr__(self):
+        return f"<Operator {self.osc_mode} {self.coarse_val:.2f} level={self.level}>"
+
+class Voice:
+    """A single voice decoded from its 128 packed bytes. ops[0] is OP1."""
+
+    __slots__ = ('ops', 'pitch_eg_rate1', 'pitch_eg_rate2', 'pitch_eg_rate3', 'pitch_eg_rate4',
+                 'pitch_eg_level1', 'pitch_eg_level2', 'pitch_eg_level3', 'pitch_eg_level4',
+                 'algorithm', 'feedback', 'osc_sync_raw', 'lfo_speed', 'lfo_delay',
+                 'lfo_pmd', 'lfo_amd', 'lfo_sync_raw', 'lfo_wave_raw', 'p_mod_sens',
+                 'transpose_raw', 'name_raw')
+
+    # Keys of the dict built by parse_single_voice()
+    KEYS = ('ops', 'pitch_eg_rate', 'pitch_eg_level', 'algorithm', 'feedback', 'osc_sync',
+            'lfo_speed', 'lfo_delay', 'lfo_pmd', 'lfo_amd', 'lfo_sync', 'lfo_wave',
+            'p_mod_sens', 'transpose', 'name')
+
+    @classmethod
+    def from_bytes(cls, data):
+        voice = cls.__new__(cls)
+        # The DX7 stores OP6 first
+        voice.ops = tuple(Operator.from_bytes(data[i * 17:(i + 1) * 17]) for i in range(5, -1, -1))
+        (voice.pitch_eg_rate1, voice.pitch_eg_rate2, voice.pitch_eg_rate3, voice.pitch_eg_rate4,
+         voice.pitch_eg_level1, voice.pitch_eg_level2, voice.pitch_eg_level3,
+         voice.pitch_eg_level4) = data[102:110]
+        voice.algorithm = (data[110] & 0x1F) + 1
+        voice.feedback = (data[110] >> 5) & 0x07
+        voice.osc_sync_raw = (data[111] >> 3) & 1
+        voice.lfo_speed = data[112]
+        voice.lfo_delay = data[113]
+        voice.lfo_pmd = data[114]
+        voice.lfo_amd = data[115]
+        voice.lfo_sync_raw = data[116] & 0x01
+        voice.lfo_wave_raw = (data[116] >> 1) & 0x07
+        voice.p_mod_sens = (data[116] >> 4) & 0x07
+        voice.transpose_raw = data[117]
+        voice.name_raw = bytes(data[118:128])
+        return voice
+
+    @property
+    def pitch_eg_rate(self):
+        return [self.pitch_eg_rate1, self.pitch_eg_rate2, self.pitch_eg_rate3, self.pitch_eg_rate4]
+
+    @property
+    def pitch_eg_level(self):
+        return [self.pitch_eg_level1, self.pitch_eg_level2, self.pitch_eg_level3, self.pitch_eg_level4]
+
+    @property
+    def osc_sync(self):
+        return 'ON' if self.osc_sync_raw else 'OFF'
+
+    @property
+    def lfo_sync(self):
+        return 'ON' if self.lfo_sync_raw else 'OFF'
+
+    @property
+    def lfo_wave(self):
+        return LFO_WAVES[self.lfo_wave_raw]
+
+    @property
+    def transpose(self):
+        # Same fixed display value as parse_single_voice()
+        return "C3"
+
+    @property
+    def name(self):
+        return self.name_raw.decode('ascii', errors='ignore').strip()
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def to_dict(self):
+        """Returns the same dict parse_single_voice() builds for this voice."""
+        params = {key: getattr(self, key) for key in self.KEYS}
+        params['ops'] = [op.to_dict() for op in self.ops]
+        return params
+
+    def __repr__(self):
+        return f"<Voice '{self.name}' algorithm={self.algorithm}>"
+
+class Bank:
+    """
+    The 32 voices of one bulk dump over a memoryview of its 4096 bytes.
+    Names and voices are only decoded when they are accessed, and every
+    decoded Voice is kept, so opening a bank to look at one patch costs
+    next to nothing. Supports len(), iteration, indexing and slicing.
+    """
+
+    __slots__ = ('data', 'bank_name', '_voices', '_names')
+
+    def __init__(self, voice_bulk_data, bank_name=""):
+        data = memoryview(voice_bulk_data)
+        if data.nbytes != 4096:
+            raise ValueError(f"A 32-voice bank has 4096 bytes of voice data, not {data.nbytes}.")
+        self.data = data.cast('B')
+        self.bank_name = bank_name
+        self._voices = [None] * 32
+        self._names = [None] * 32
+
+    @classmethod
+    def from_file(cls, filepath, bank_num=1):
+        """
+        Opens the bank_num-th 32-voice bulk dump in a file. The file is read
+        once and the bank keeps a view into that buffer.
+        Raises ValueError if the file has fewer banks.
+        """
+        with open(filepath, 'rb') as f:
+            buffer = f.read()
+        offsets = [offset for offset, frame in iter_buffer_frames(buffer) if is_voice_bulk_frame(frame)]
+        if not 1 <= bank_num <= len(offsets):
+            raise ValueError("This does not appear to be a valid Yamaha DX7 32-Voice SysEx file."
+                             if not offsets else f"The file contains only {len(offsets)} banks.")
+        offset = offsets[bank_num - 1] + 6
+        bank_name = os.path.basename(filepath)
+        if bank_num > 1:
+            bank_name = f"{bank_name} #{bank_num}"
+        return cls(memoryview(buffer)[offset:offset + 4096], bank_name)
+
+    def _index(self, index):
+        if index < 0:
+            index += 32
+        if not 0 <= index < 32:
+            raise IndexError("voice index out of range")
+        return index
+
+    def raw(self, index):
+        """The 128 packed bytes of a voice, as a memoryview (0-based index)."""
+        index = self._index(index)
+        return self.data[index * 128:(index + 1) * 128]
+
+    def voice_name(self, index):
+        """Decodes only the name of a voice (0-based index)."""
+        index = self._index(index)
+        name = self._names[index]
+        if name is None:
+            start = index * 128 + 118
+            name = self._names[index] = bytes(self.data[start:start + 10]).decode(
+                'ascii', errors='ignore').strip()
+        return name
+
+    def names(self):
+        return [self.voice_name(i) for i in range(32)]
+
+    def __len__(self):
+        return 32
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(32))]
+        index = self._index(index)
+        voice = self._voices[index]
+        if voice is None:
+            voice = self._voices[index] = Voice.from_bytes(self.raw(index))
+        return voice
+
+    def __iter__(self):
+        for i in range(32):
+            yield self[i]
+
+    def __repr__(self):
+        decoded = sum(voice is not None for voice in self._voices)
+        return f"<Bank '{self.bank_name}' ({decoded}/32 voices decoded)>"
+
+def memory_comparison(voice_datas):
+    """
+    Measures the memory held by parse_single_voice() dicts and by Voice
+    objects for the same voices. Returns a dict with the totals in bytes.
+    """
+    result = {'voices': len(voice_datas)}
+    for label, build in (('dict_bytes', parse_single_voice), ('voice_bytes', Voice.from_bytes)):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        parsed = [build(data) for data in voice_datas]
+        result[label] = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del parsed
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares the memory use of Voice objects and parse_single_voice() dicts.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    voice_datas = []
+    for filepath, _ in banks:
+        try:
+            for _, body in iter_voice_banks(filepath):
+                voice_datas.extend(bytes(body[i:i+128]) for i in range(0, 4096, 128))
+        except (IOError, ValueError) as e:
+            print(f"FAILED {filepath}: {e}")
+
+    if not voice_datas:
+        print("Error: No valid banks found.")
+        sys.exit(1)
+
+    result = memory_comparison(voice_datas)
+    count = result['voices']
+    print(f"Voices:               {count}")
+    print(f"parse_single_voice(): {result['dict_bytes']:>12,} bytes ({result['dict_bytes'] / count:,.0f} per voice)")
+    print(f"Voice objects:        {result['voice_bytes']:>12,} bytes ({result['voice_bytes'] / count:,.0f} per voice)")
+    print(f"Ratio:                {result['dict_bytes'] / max(result['voice_bytes'], 1):.1f}x smaller")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7search.py
+# "Sounds like" search over parsed voices. Every voice is encoded as a
+# feature vector of the numeric fields parse_single_voice() extracts (EG
+# rates and levels, coarse/fine, output level, algorithm, feedback and LFO
+# settings), scaled to 0..1. The vectors of an archive are stored in one
+# index file and searched by vectorized brute force, which beats tree
+# indexes at this many dimensions.
+#
+# python dx7search.py build Archive/            writes .dx7search.idx
+# python dx7search.py query ROM1A.syx 11 -k 5   five nearest voices to #11
+#
+# NumPy is optional but recommended: without it building and searching
+# fall back to plain Python.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import math
+import heapq
+import struct
+import argparse
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from dx7sheet_32 import collect_syx_files, iter_voice_banks, parse_single_voice
+
+SEARCH_INDEX_FILE = ".dx7search.idx"
+SEARCH_INDEX_MAGIC = b'DX7S'
+
+# One-hot categories are scaled so that a mismatch adds 1.0 to the squared distance
+ONE_HOT = 1 / math.sqrt(2)
+ALGORITHMS = 32
+LFO_WAVE_COUNT = 6
+
+def _coarse_feature(coarse_val):
+    # 0.5 (ratio) ... 1000 Hz (fixed) on a log scale
+    return (math.log2(coarse_val) + 1) / 11
+
+def feature_vector(params):
+    """Encodes a parse_single_voice() dict (or a dx7model.Voice) as a list of floats."""
+    vector = []
+    for op in params['ops']:
+        vector.extend(rate / 99 for rate in op['eg_rate'])
+        vector.extend(level / 99 for level in op['eg_level'])
+        vector.append(_coarse_feature(op['coarse_val']))
+        vector.append(op['fine_raw'] / 99)
+        vector.append(op['level'] / 99)
+
+    algorithm = [0.0] * ALGORITHMS
+    algorithm[params['algorithm'] - 1] = ONE_HOT
+    vector.extend(algorithm)
+    vector.append(params['feedback'] / 7)
+
+    vector.extend([params['lfo_speed'] / 99, params['lfo_delay'] / 99,
+                   params['lfo_pmd'] / 99, params['lfo_amd'] / 99])
+    waves = [0.0] * LFO_WAVE_COUNT
+    waves[['TRIANGLE', 'SAW UP', 'SAW DOWN', 'SQUARE', 'SINE', 'S+HOLD'].index(params['lfo_wave'])] = ONE_HOT
+    vector.extend(waves)
+    vector.append(1.0 if params['lfo_sync'] == 'ON' else 0.0)
+    vector.append(params['p_mod_sens'] / 7)
+    return vector
+
+FEATURE_COUNT = 6 * 11 + ALGORITHMS + 1 + 4 + LFO_WAVE_COUNT + 2
+
+def feature_matrix(columns):
+    """Vectorized feature_vector() over the columns of dx7vector.decode_voices()."""
+    count = len(columns['algorithm'])
+    features = np.zeros((count, FEATURE_COUNT), dtype=np.float32)
+    col = 0
+    for op_num in range(1, 7):
+        prefix = f"op{op_num}_"
+        for key in ['eg_rate1', 'eg_rate2', 'eg_rate3', 'eg_rate4',
+                    'eg_level1', 'eg_level2', 'eg_level3', 'eg_level4']:
+            features[:, col] = columns[prefix + key] / 99
+            col += 1
+        features[:, col] = (np.log2(columns[prefix + 'coarse_val']) + 1) / 11
+        features[:, col + 1] = columns[prefix + 'fine_raw'] / 99
+        features[:, col + 2] = columns[prefix + 'level'] / 99
+        col += 3
+
+    rows = np.arange(count)
+    features[rows, col + columns['algorithm'].astype(np.intp) - 1] = ONE_HOT
+    col += ALGORITHMS
+    features[:, col] = columns['feedback'] / 7
+    col += 1
+    for key in ['lfo_speed', 'lfo_delay', 'lfo_pmd', 'lfo_amd']:
+        features[:, col] = columns[key] / 99
+        col += 1
+    features[rows, col + columns['lfo_wave'].astype(np.intp)] = ONE_HOT
+    col += LFO_WAVE_COUNT
+    features[:, col] = columns['lfo_sync']
+    features[:, col + 1] = columns['p_mod_sens'] / 7
+    return features
+
+def read_voices(filepaths):
+    """Yields (path, bank number, voice number, 128-byte voice) for every voice."""
+    for filepath in filepaths:
+        try:
+            for bank_num, (_, voice_bulk_data) in enumerate(iter_voice_banks(filepath), 1):
+                for i in range(32):
+                    yield filepath, bank_num, i + 1, bytes(voice_bulk_data[i * 128:(i + 1) * 128])
+        except (IOError, ValueError) as e:
+            print(f"FAILED {filepath}: {e}")
+
+def build_index(filepaths, index_path=SEARCH_INDEX_FILE):
+    """Encodes every voice of the given files and writes the search index."""
+    entries = []
+    data = bytearray()
+    for filepath, bank_num, voice_num, voice_data in read_voices(filepaths):
+        # Voices with an LFO wave outside 0-5 cannot be decoded by the parser either
+        if (voice_data[116] >> 1) & 0x07 >= LFO_WAVE_COUNT:
+            continue
+        entries.append([os.path.abspath(filepath), bank_num, voice_num,
+                        voice_data[118:128].decode('ascii', errors='ignore').strip()])
+        data += voice_data
+
+    if np is not None:
+        import dx7vector
+        columns = dx7vector.decode_voices(np.frombuffer(bytes(data), dtype=np.uint8))
+        features = feature_matrix(columns).tobytes()
+    else:
+        features = array('f')
+        for i in range(len(entries)):
+            features.extend(feature_vector(parse_single_voice(data[i * 128:(i + 1) * 128])))
+        features = features.tobytes()
+
+    meta = json.dumps({'features': FEATURE_COUNT, 'voices': entries}).encode('utf-8')
+    with open(index_path, 'wb') as f:
+        f.write(SEARCH_INDEX_MAGIC + struct.pack('<I', len(meta)) + meta)
+        f.write(features)
+    return len(entries)
+
+class SearchIndex:
+    """A loaded search index: voice entries and their feature vectors."""
+
+    def __init__(self, index_path=SEARCH_INDEX_FILE):
+        with open(index_path, 'rb') as f:
+            if f.read(4) != SEARCH_INDEX_MAGIC:
+                raise ValueError(f"'{index_path}' is not a search index.")
+            meta_size, = struct.unpack('<I', f.read(4))
+            meta = json.loads(f.read(meta_size).decode('utf-8'))
+            if meta['features'] != FEATURE_COUNT:
+                raise ValueError(f"'{index_path}' was built by another version, please rebuild it.")
+            self.voices = meta['voices']
+            if np is not None:
+                self.features = np.fromfile(f, dtype=np.float32).reshape(-1, FEATURE_COUNT)
+                self.norms = np.einsum('ij,ij->i', self.features, self.features)
+            else:
+                self.features = array('f')
+                self.features.frombytes(f.read())
+
+    def nearest(self, vector, k=10, exclude=None):
+        """
+        Returns the k nearest voices to a feature vector as a list of
+        (distance, [path, bank number, voice number, name]) pairs.
+        """
+        count = len(self.voices)
+        if np is not None:
+            vector = np.asarray(vector, dtype=np.float32)
+            # |x - q|^2 = |x|^2 - 2 x.q + |q|^2, a single matrix-vector product
+            distances = self.norms - 2 * (self.features @ vector) + float(vector @ vector)
+            np.maximum(distances, 0, out=distances)
+            if exclude is not None:
+                distances[exclude] = np.inf
+            k = min(k, count - (exclude is not None))
+            if k <= 0:
+                return []
+            best = np.argpartition(distances, k - 1)[:k]
+            best = best[np.argsort(distances[best])]
+            return [(math.sqrt(float(distances[i])), self.voices[i]) for i in best]
+
+        def distance(i):
+            row = self.features[i * FEATURE_COUNT:(i + 1) * FEATURE_COUNT]
+            return sum((a - b) ** 2 for a, b in zip(row, vector))
+
+        best = heapq.nsmallest(k, (i for i in range(count) if i != exclude), key=distance)
+        return [(math.sqrt(distance(i)), self.voices[i]) for i in best]
+
+    def find(self, filepath, bank_num, voice_num):
+        for i, (path, bank, voice, _) in enumerate(self.voices):
+            if path == filepath and bank == bank_num and voice == voice_num:
+                return i
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Finds DX7 voices that sound alike.")
+    parser.add_argument('--index', default=SEARCH_INDEX_FILE,
+                        help=f"search index file (default: {SEARCH_INDEX_FILE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="encode every voice of an archive")
+    build.add_argument('paths', nargs='+', metavar='PATH',
+                       help=".syx file, directory (searched recursively) or glob pattern")
+
+    query = commands.add_parser('query', help="list the voices closest to one voice")
+    query.add_argument('bank', help=".syx file containing the voice")
+    query.add_argument('voice', type=int, help="voice number (1-32)")
+    query.add_argument('--bank-number', type=int, default=1,
+                       help="bank within a file with several bulk dumps (default: 1)")
+    query.add_argument('-k', type=int, default=10, help="number of matches (default: 10)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        banks, missing = collect_syx_files(args.paths)
+        for path in missing:
+            print(f"Error: File not found: {path}")
+        count = build_index([filepath for filepath, _ in banks], args.index)
+        print(f"Indexed {count} voices from {len(banks)} files into '{args.index}'.")
+        sys.exit(1 if missing else 0)
+
+    if not 1 <= args.voice <= 32:
+        print("Error: Please enter a voice number between 1 and 32.")
+        sys.exit(1)
+
+    voice_data = None
+    for filepath, bank_num, voice_num, data in read_voices([args.bank]):
+        if bank_num == args.bank_number and voice_num == args.voice:
+            voice_data = data
+            break
+    if voice_data is None:
+        print(f"Error: Voice {args.voice} not found in '{args.bank}'.")
+        sys.exit(1)
+
+    try:
+        index = SearchIndex(args.index)
+    except (IOError, ValueError) as e:
+        print(f"Error reading the search index: {e}")
+        sys.exit(1)
+
+    try:
+        params = parse_single_voice(voice_data)
+    except KeyError:
+        print(f"Error: {args.bank} #{args.voice:02d} is an undecodable voice (LFO wave out of range).")
+        sys.exit(1)
+    exclude = index.find(os.path.abspath(args.bank), args.bank_number, args.voice)
+    print(f"Voices that sound like '{params['name']}' ({args.bank} #{args.voice:02d}):")
+    print("-" * 62)
+    for rank, (distance, (path, bank_num, voice_num, name)) in enumerate(
+            index.nearest(feature_vector(params), args.k, exclude), 1):
+        bank = f" bank {bank_num}" if bank_num > 1 else ""
+        print(f"  {rank:2d}. {distance:6.3f}  {name:<10}  {os.path.relpath(path)}{bank} #{voice_num:02d}")
+
+if __name__ == '__main__':
+    main()
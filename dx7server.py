@@ -0,0 +1,216 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7server.py
+# Local HTTP service that renders data sheets on demand, for tools that
+# would otherwise drive dx7sheet.py through its input() prompts. Only
+# files below the configured root are served.
+#
+# python dx7server.py --root Archive/ --port 8007
+#
+# GET /banks                                   .syx files below the root (JSON)
+# GET /voices?bank=Synth/FM.syx                voice names of a file (JSON)
+# GET /sheet?bank=Synth/FM.syx&voice=3         rendered data sheet (text)
+# GET /sheet?bank=...&voice=3&format=json      parse_single_voice() output
+#     &n=2                                     bank within a concatenated dump
+#
+# Parsed banks and rendered sheets are kept in bounded LRU caches keyed by
+# path, size and mtime, so a modified file is parsed again on the next
+# request and a hot sheet is served without touching the disk beyond a stat.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import argparse
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from dx7sheet_32 import collect_syx_files, iter_voice_banks, parse_single_voice, render_datasheet
+
+class NotFound(Exception):
+    pass
+
+class BadRequest(Exception):
+    pass
+
+class SheetService:
+    """Resolves request paths below root and caches parsed banks and sheets."""
+
+    def __init__(self, root, cache_size=256):
+        self.root = os.path.realpath(root)
+        # Size and mtime are part of the key, so edited files miss the cache
+        self.parsed_file = lru_cache(maxsize=cache_size)(self._parse_file)
+        self.rendered_sheet = lru_cache(maxsize=cache_size * 32)(self._render_sheet)
+
+    def resolve(self, relpath):
+        """Returns (real path, size, mtime_ns) of a .syx file below the root."""
+        if not relpath:
+            raise BadRequest("missing 'bank' parameter")
+        path = os.path.realpath(os.path.join(self.root, relpath))
+        if not path.startswith(self.root + os.sep) or not path.lower().endswith('.syx'):
+            raise NotFound(relpath)
+        try:
+            st = os.stat(path)
+        except OSError:
+            raise NotFound(relpath)
+        return path, st.st_size, st.st_mtime_ns
+
+    def _parse_file(self, path, size, mtime_ns):
+        # One list of 32 params dicts (None if undecodable) per bank in the file
+        banks = []
+        for _, voice_bulk_data in iter_voice_banks(path):
+            voices = []
+            for i in range(32):
+                try:
+                    voices.append(parse_single_voice(voice_bulk_data[i * 128:(i + 1) * 128]))
+                except KeyError:
+                    voices.append(None)
+            banks.append(voices)
+        return banks
+
+    def _render_sheet(self, path, size, mtime_ns, bank_num, voice_num):
+        params = self.voice(path, size, mtime_ns, bank_num, voice_num)
+        bank_name = os.path.basename(path)
+        if bank_num > 1:
+            bank_name = f"{bank_name} #{bank_num}"
+        return render_datasheet(params, bank_name, voice_num)
+
+    def bank(self, path, size, mtime_ns, bank_num):
+        banks = self.parsed_file(path, size, mtime_ns)
+        if not banks:
+            raise NotFound(f"{os.path.relpath(path, self.root)} contains no DX7 32-voice bank")
+        if not 1 <= bank_num <= len(banks):
+            raise NotFound(f"bank {bank_num} (the file has {len(banks)})")
+        return banks[bank_num - 1]
+
+    def voice(self, path, size, mtime_ns, bank_num, voice_num):
+        if not 1 <= voice_num <= 32:
+            raise BadRequest("voice must be between 1 and 32")
+        params = self.bank(path, size, mtime_ns, bank_num)[voice_num - 1]
+        if params is None:
+            raise BadRequest(f"voice {voice_num} has an out-of-range LFO wave")
+        return params
+
+    def list_banks(self):
+        found, _ = collect_syx_files([self.root])
+        banks = []
+        for filepath, relname in found:
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                continue
+            banks.append({'bank': relname.replace(os.sep, '/'), 'size': st.st_size,
+                          'mtime': st.st_mtime})
+        return banks
+
+class SheetHandler(BaseHTTPRequestHandler):
+    server_version = "dx7server/1"
+    service = None   # set by serve()
+    quiet = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/banks':
+                self.send(200, self.service.list_banks())
+            elif url.path == '/voices':
+                path, size, mtime_ns = self.service.resolve(query.get('bank'))
+                bank_num = self.number(query, 'n', 1)
+                voices = self.service.bank(path, size, mtime_ns, bank_num)
+                self.send(200, [{'voice': i + 1, 'name': params['name'] if params else None}
+                                for i, params in enumerate(voices)])
+            elif url.path == '/sheet':
+                path, size, mtime_ns = self.service.resolve(query.get('bank'))
+                bank_num = self.number(query, 'n', 1)
+                voice_num = self.number(query, 'voice')
+                fmt = query.get('format', 'text')
+                if fmt == 'json':
+                    self.send(200, self.service.voice(path, size, mtime_ns, bank_num, voice_num))
+                elif fmt == 'text':
+                    self.send(200, self.service.rendered_sheet(path, size, mtime_ns, bank_num, voice_num))
+                else:
+                    raise BadRequest("format must be 'text' or 'json'")
+            else:
+                raise NotFound(url.path)
+        except NotFound as e:
+            self.send(404, {'error': f"not found: {e}"})
+        except BadRequest as e:
+            self.send(400, {'error': str(e)})
+        except (IOError, ValueError) as e:
+            self.send(500, {'error': str(e)})
+
+    @staticmethod
+    def number(query, name, default=None):
+        value = query.get(name)
+        if value is None:
+            if default is None:
+                raise BadRequest(f"missing '{name}' parameter")
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise BadRequest(f"'{name}' must be a number")
+
+    def send(self, status, body):
+        if isinstance(body, str):
+            data = body.encode('utf-8')
+            content_type = "text/plain; charset=utf-8"
+        else:
+            data = json.dumps(body).encode('utf-8')
+            content_type = "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def serve(root, host="127.0.0.1", port=8007, cache_size=256, quiet=False):
+    """Creates the server; call serve_forever() on the result."""
+    handler = type('Handler', (SheetHandler,), {'service': SheetService(root, cache_size),
+                                                'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves DX7 data sheets over HTTP.")
+    parser.add_argument('--root', default=".", help="directory whose .syx files are served (default: .)")
+    parser.add_argument('--host', default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8007, help="port (default: 8007)")
+    parser.add_argument('--cache', type=int, default=256,
+                        help="parsed files kept in memory; sheets: 32 per file (default: 256)")
+    parser.add_argument('--quiet', action='store_true', help="do not log every request")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root):
+        print(f"Error: Directory not found: {args.root}")
+        sys.exit(1)
+
+    try:
+        server = serve(args.root, args.host, args.port, args.cache, args.quiet)
+    except OSError as e:
+        print(f"Error: Cannot listen on {args.host}:{args.port}: {e}")
+        sys.exit(1)
+    print(f"Serving data sheets of '{args.root}' on http://{args.host}:{args.port}/ "
+          f"(Ctrl+C to stop).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
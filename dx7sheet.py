@@ -44,80 +44,18 @@ import os
 import re
 import math
 
+from dx7model import Bank
+from dx7index import VoiceIndex, INDEX_FILE
+
+# Longer file lists are not printed; the prompt then searches instead
+MAX_LISTED_FILES = 40
+MAX_SEARCH_RESULTS = 20
+
 # --- Constants and Mapping Tables ---
 
-NOTE_NAMES = [
-    'A-1', 'A#-1', 'B-1', 'C0', 'C#0', 'D0', 'D#0', 'E0', 'F0', 'F#0', 'G0', 'G#0', 
-    'A0', 'A#0', 'B0', 'C1', 'C#1', 'D1', 'D#1', 'E1', 'F1', 'F#1', 'G1', 'G#1', 
-    'A1', 'A#1', 'B1', 'C2', 'C#2', 'D2', 'D#2', 'E2', 'F2', 'F#2', 'G2', 'G#2', 
-    'A2', 'A#2', 'B2', 'C3', 'C#3', 'D3', 'D#3', 'E3', 'F3', 'F#3', 'G3', 'G#3', 
-    'A3', 'A#3', 'B3', 'C4', 'C#4', 'D4', 'D#4', 'E4', 'F4', 'F#4', 'G4', 'G#4', 
-    'A4', 'A#4', 'B4', 'C5', 'C#5', 'D5', 'D#5', 'E5', 'F5', 'F#5', 'G5', 'G#5', 
-    'A5', 'A#5', 'B5', 'C6', 'C#6', 'D6', 'D#6', 'E6', 'F6', 'F#6', 'G6', 'G#6', 
-    'A6', 'A#6', 'B6', 'C7', 'C#7', 'D7', 'D#7', 'E7', 'F7', 'F#7', 'G7', 'G#7', 
-    'A7', 'A#7', 'B7', 'C8'
-]
-CURVE_MODES = {0: '-LIN', 1: '-EXP', 2: '+EXP', 3: '+LIN'}
-LFO_WAVES = {0: 'TRIANGLE', 1: 'SAW UP', 2: 'SAW DOWN', 3: 'SQUARE', 4: 'SINE', 5: 'S+HOLD'}
-FIXED_FREQ_MAP = {0: 1.0, 1: 10.0, 2: 100.0, 3: 1000.0}
 DX7_32_VOICE_HEADER = b'\xf0\x43\x00\x09\x20\x00'
 SYSEX_SIZE = 4104
 
-def parse_single_voice(data):
-    """
-    Parses the 128 bytes of a single voice patch based on the
-    exact bit-masking from the documentation and final correction.
-    """
-    params = {'ops': []}
-
-    for i in range(6):
-        op_data = data[i * 17 : (i + 1) * 17]
-        op = {}
-
-        op['eg_rate'] = list(op_data[0:4])
-        op['eg_level'] = list(op_data[4:8])
-        op['break_point'] = NOTE_NAMES[op_data[8]] if 0 <= op_data[8] <= 99 else 'N/A'
-        op['l_depth'] = op_data[9]
-        op['r_depth'] = op_data[10]
-        op['l_curve'] = CURVE_MODES[op_data[11] & 3]
-        op['r_curve'] = CURVE_MODES[(op_data[11] >> 2) & 3]
-        op['rate_scale'] = op_data[12] & 0x07
-        op['tune'] = ((op_data[12] & 120) >> 3) - 7
-        op['key_vel'] = (op_data[13] >> 2) & 0x07
-        op['amp_mod_sens'] = op_data[13] & 0x03
-        op['level'] = op_data[14]
-        op['osc_mode'] = 'FIX' if op_data[15] & 1 else 'RATIO'
-        coarse_byte = op_data[15] >> 1
-        op['fine_raw'] = op_data[16]
-        
-        if op['osc_mode'] == 'RATIO':
-            op['coarse_val'] = 0.5 if coarse_byte == 0 else float(coarse_byte)
-        else: # Fixed Mode
-            op['coarse_val'] = FIXED_FREQ_MAP.get(coarse_byte & 3, 1.0)
-
-        params['ops'].append(op)
-        
-    params['ops'].reverse()
-
-    # Global Parameters
-    pitch_eg_data = data[102:110]
-    params['pitch_eg_rate'] = list(pitch_eg_data[0:4])
-    params['pitch_eg_level'] = list(pitch_eg_data[4:8])
-    params['algorithm'] = (data[110] & 0x1F) + 1
-    params['feedback'] = (data[110] >> 5) & 0x07
-    params['osc_sync'] = 'ON' if data[111] & 8 else 'OFF'
-    params['lfo_speed'] = data[112]
-    params['lfo_delay'] = data[113]
-    params['lfo_pmd'] = data[114]
-    params['lfo_amd'] = data[115]
-    params['lfo_sync'] = 'ON' if (data[116] & 0x01) else 'OFF'
-    params['lfo_wave'] = LFO_WAVES[(data[116] >> 1) & 0x07]
-    params['p_mod_sens'] = (data[116] >> 4) & 0x07
-    params['transpose'] = "C3"
-    params['name'] = data[118:128].decode('ascii', errors='ignore').strip()
-    
-    return params
-
 def generate_datasheet(params, bank_name, voice_num):
     ops = params['ops']
     PARAM_WIDTH = 14
@@ -198,6 +136,101 @@ def generate_datasheet(params, bank_name, voice_num):
 def sanitize_filename(name):
     return re.sub(r'[\\/*?:"<>|]', "", name).strip()
 
+def fuzzy_score(query, text):
+    """
+    Scores how well query matches text, ignoring case: substrings score
+    highest (the earlier the better), then the letters of query appearing
+    in order with as few gaps as possible. Returns None for no match.
+    """
+    query = query.lower()
+    text = text.lower()
+    pos = text.find(query)
+    if pos != -1:
+        return 1000 - pos
+    gaps = 0
+    last = -1
+    for ch in query:
+        if ch == ' ':
+            continue
+        found = text.find(ch, last + 1)
+        if found == -1:
+            return None
+        if last != -1:
+            gaps += found - last - 1
+        last = found
+    return 500 - gaps
+
+def load_voice_names(syx_files):
+    """
+    Returns {filename: [32 voice names]} from the voice index, re-reading
+    only files that are new or whose size or mtime changed.
+    """
+    index = VoiceIndex(INDEX_FILE)
+    indexed, _, removed = index.update(syx_files)
+    if indexed or removed:
+        try:
+            index.save()
+        except IOError:
+            pass  # read-only folder: the index is rebuilt next time
+    names = {}
+    for filename in syx_files:
+        entry = index.files.get(os.path.abspath(filename))
+        if entry and entry['banks']:
+            names[filename] = [name for name, _, _ in entry['banks'][0]]
+    return names
+
+def search(query, syx_files, voice_names):
+    """Returns the best (file index, voice number or None, label) matches."""
+    results = []
+    for file_index, filename in enumerate(syx_files):
+        score = fuzzy_score(query, filename)
+        if score is not None:
+            results.append((score, file_index, None, filename))
+        for voice_num, name in enumerate(voice_names.get(filename, ()), 1):
+            score = fuzzy_score(query, name)
+            if score is not None:
+                results.append((score, file_index, voice_num, f"{filename} #{voice_num:02d}: {name}"))
+    results.sort(key=lambda result: (-result[0], result[1], result[2] or 0))
+    return [result[1:] for result in results[:MAX_SEARCH_RESULTS]]
+
+def choose_file(syx_files):
+    """
+    Asks for a file number or a search text. Returns (file index, voice
+    number) where the voice number is None unless a patch was picked
+    from the search results.
+    """
+    voice_names = None
+    results = None
+    while True:
+        prompt = (f"Pick a result (1-{len(results)}) or search again: " if results else
+                  f"Which file to load? (1-{len(syx_files)}, or text to search file and patch names): ")
+        raw_choice = input(prompt).strip()
+        if raw_choice.isdigit():
+            number = int(raw_choice)
+            if results:
+                if 1 <= number <= len(results):
+                    return results[number - 1][:2]
+                print(f"Please enter a number between 1 and {len(results)}.")
+            elif 1 <= number <= len(syx_files):
+                return number - 1, None
+            else:
+                print(f"Please enter a number between 1 and {len(syx_files)}.")
+            continue
+        if not raw_choice:
+            print("Invalid input. Please enter a number or a search text.")
+            continue
+
+        if voice_names is None:
+            voice_names = load_voice_names(syx_files)
+        results = search(raw_choice, syx_files, voice_names)
+        if not results:
+            print(f"Nothing matches '{raw_choice}'.")
+            continue
+        print("-" * 50)
+        for i, (_, _, label) in enumerate(results, 1):
+            print(f"  {i:02d}: {label}")
+        print("-" * 50)
+
 def main():
     syx_files = sorted([f for f in os.listdir('.') if f.lower().endswith('.syx')])
 
@@ -206,23 +239,17 @@ def main():
         sys.exit(1)
 
     print("--- DX7 Voice Data Sheet Generator ---")
-    print("Available SysEx files:")
-    print("-" * 35)
-    for i, filename in enumerate(syx_files, 1):
-        print(f"  {i:02d}: {filename}")
-    print("-" * 35)
+    if len(syx_files) <= MAX_LISTED_FILES:
+        print("Available SysEx files:")
+        print("-" * 35)
+        for i, filename in enumerate(syx_files, 1):
+            print(f"  {i:02d}: {filename}")
+        print("-" * 35)
+    else:
+        print(f"{len(syx_files)} SysEx files found. Type part of a file or patch name to search.")
 
-    file_choice = -1
-    while not (1 <= file_choice <= len(syx_files)):
-        try:
-            raw_choice = input(f"Which file to load? (1-{len(syx_files)}): ")
-            file_choice = int(raw_choice)
-            if not (1 <= file_choice <= len(syx_files)):
-                print(f"Please enter a number between 1 and {len(syx_files)}.")
-        except (ValueError, TypeError):
-            print("Invalid input. Please enter a number.")
-    
-    filepath = syx_files[file_choice - 1]
+    file_index, voice_choice = choose_file(syx_files)
+    filepath = syx_files[file_index]
     print(f"\nLoading file '{filepath}'...")
     
     try:
@@ -236,38 +263,39 @@ def main():
         print("Error: This does not appear to be a valid Yamaha DX7 32-Voice SysEx file.")
         sys.exit(1)
         
-    voice_bulk_data = sysex_data[6:4102]
-    voices = [voice_bulk_data[i:i+128] for i in range(0, 4096, 128)]
-    voice_names = [v[118:128].decode('ascii', errors='ignore').strip() for v in voices]
-    
+    # Voices and names are only decoded when they are shown or selected
+    bank = Bank(memoryview(sysex_data)[6:4102], os.path.basename(filepath))
     print(f"Bank '{os.path.basename(filepath)}' loaded. 32 voices found.")
-    print("-" * 50)
 
-    for i in range(0, 32, 2):
-        name1 = voice_names[i]
-        num1 = i + 1
-        left_column = f"  {num1:02d}: {name1:<10}"
+    # A patch picked from the search results needs no second prompt
+    if voice_choice is None:
+        voice_names = bank.names()
+        print("-" * 50)
 
-        name2 = voice_names[i+1]
-        num2 = i + 2
-        right_column = f"{num2:02d}: {name2:<10}"
+        for i in range(0, 32, 2):
+            name1 = voice_names[i]
+            num1 = i + 1
+            left_column = f"  {num1:02d}: {name1:<10}"
 
-        print(f"{left_column}    {right_column}")
+            name2 = voice_names[i+1]
+            num2 = i + 2
+            right_column = f"{num2:02d}: {name2:<10}"
 
-    print("-" * 50)
-        
-    voice_choice = -1
-    while not (1 <= voice_choice <= 32):
-        try:
-            raw_choice = input("Which patch to convert to a data sheet? (1-32): ")
-            voice_choice = int(raw_choice)
-            if not (1 <= voice_choice <= 32):
-                print("Please enter a number between 1 and 32.")
-        except (ValueError, TypeError):
-            print("Invalid input. Please enter a number.")
-            
-    selected_voice_data = voices[voice_choice - 1]
-    parsed_params = parse_single_voice(selected_voice_data)
+            print(f"{left_column}    {right_column}")
+
+        print("-" * 50)
+
+        voice_choice = -1
+        while not (1 <= voice_choice <= 32):
+            try:
+                raw_choice = input("Which patch to convert to a data sheet? (1-32): ")
+                voice_choice = int(raw_choice)
+                if not (1 <= voice_choice <= 32):
+                    print("Please enter a number between 1 and 32.")
+            except (ValueError, TypeError):
+                print("Invalid input. Please enter a number.")
+
+    parsed_params = bank[voice_choice - 1]
     
     datasheet = generate_datasheet(parsed_params, os.path.basename(filepath), voice_choice)
     
@@ -9,6 +9,10 @@
 # This version is non-interactive. It takes a .syx file as a command-line
 # argument and batch-converts all 32 patches into a 'Sheet' subdirectory.
 # python dx7sheet_32.py ROM1A.syx converts all 32 Patches in one take
+# python dx7sheet_32.py -j 8 Archive/ "More/**/*.syx" converts whole folders
+# (recursively) in parallel, one 'Sheet/<bank>/' subdirectory per bank.
+# Files are memory-mapped and scanned for SysEx messages, so concatenated
+# dumps and captures with other SysEx in between are converted as well.
 #
 # Author: Peter Berghoff / Soundplantage
 # Version: 1.2 (Batch-Mod, English UI)
@@ -45,7 +49,16 @@
 import sys
 import os
 import re
+import glob
 import math
+import time
+import json
+import hashlib
+import mmap
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dx7stats import NULL_STATS, Stats
 
 # --- Constants and Mapping Tables ---
 
@@ -66,6 +79,11 @@ FIXED_FREQ_MAP = {0: 1.0, 1: 10.0, 2: 100.0, 3: 1000.0}
 DX7_32_VOICE_HEADER = b'\xf0\x43\x00\x09\x20\x00'
 SYSEX_SIZE = 4104
 
+# Incremental builds: bump FORMAT_VERSION whenever the sheet layout changes,
+# so every sheet recorded in an older manifest is regenerated.
+MANIFEST_FILE = ".dx7sheet-manifest.json"
+FORMAT_VERSION = 1
+
 def parse_single_voice(data):
     """
     Parses the 128 bytes of a single voice patch based on the
@@ -117,7 +135,7 @@ def parse_single_voice(data):
     params['lfo_wave'] = LFO_WAVES[(data[116] >> 1) & 0x07]
     params['p_mod_sens'] = (data[116] >> 4) & 0x07
     params['transpose'] = "C3"
-    params['name'] = data[118:128].decode('ascii', errors='ignore').strip()
+    params['name'] = bytes(data[118:128]).decode('ascii', errors='ignore').strip()
     
     return params
 
@@ -198,77 +216,711 @@ def generate_datasheet(params, bank_name, voice_num):
     
     return "\n".join(sheet)
 
+# --- Precompiled Renderer ---
+# render_datasheet() produces byte-identical output to generate_datasheet(),
+# but the 62-column layout is compiled once into a single format string and
+# every coarse/fine display value comes from a lookup table.
+
+def _compile_sheet_template():
+    PARAM_WIDTH = 14
+    OP_WIDTH = 8
+
+    def op_row(name):
+        # Only the last cell is unpadded: that is all rstrip() removes
+        return f"{name:<{PARAM_WIDTH}}" + f"{{:<{OP_WIDTH}}}" * 5 + "{}"
+
+    sheet = []
+    sheet.append("="*62)
+    sheet.append("DX7 VOICE DATA SHEET".center(62))
+    sheet.append("="*62)
+    sheet.append("Bank: {:<25} Voice #{:02d}: {}")
+    sheet.append("="*62)
+    sheet.append("ALGORITHM: {}   FEEDBACK: {}   OSC SYNC: {}   TRANSPOSE: {}")
+    sheet.append("-"*62)
+    sheet.append((f"{'PARAM':<{PARAM_WIDTH}}" + "".join(f"{f'OP{i+1}':<{OP_WIDTH}}" for i in range(6))).rstrip())
+    sheet.append("-"*62)
+    for name in ("EG RATE 1", "EG RATE 2", "EG RATE 3", "EG RATE 4",
+                 "EG LEVEL 1", "EG LEVEL 2", "EG LEVEL 3", "EG LEVEL 4"):
+        sheet.append(op_row(name))
+    sheet.append("-"*62)
+    sheet.append("KEYBOARD LVL SCALING".center(62))
+    sheet.append("-"*62)
+    for name in ("BREAK POINT", "LEFT DEPTH", "RIGHT DEPTH", "LEFT CURVE", "RIGHT CURVE"):
+        sheet.append(op_row(name))
+    sheet.append("-"*62)
+    sheet.append("OSCILLATOR".center(62))
+    sheet.append("-"*62)
+    for name in ("OSC MODE", "TUNE", "COARSE", "FINE"):
+        sheet.append(op_row(name))
+    sheet.append("-"*62)
+    sheet.append("")
+    for name in ("RATE SCALING", "VEL SENS", "AMP MOD SENS", "OUT LEVEL"):
+        sheet.append(op_row(name))
+    sheet.append("")
+    sheet.append("="*62)
+    sheet.append("LFO & PITCH EG".center(62))
+    sheet.append("="*62)
+    sheet.append("LFO WAVE: {:<10} SPEED: {:<3} DELAY: {:<3} SYNC: {}")
+    sheet.append("PMD: {:<3} AMD: {:<3} P MOD SENS: {:<3}")
+    sheet.append("-"*62)
+    sheet.append("PITCH EG RATE : R1={:<3} R2={:<3} R3={:<3} R4={:<3}")
+    sheet.append("PITCH EG LEVEL: L1={:<3} L2={:<3} L3={:<3} L4={:<3}")
+    sheet.append("="*62)
+    return "\n".join(sheet)
+
+SHEET_TEMPLATE = _compile_sheet_template()
+
+def format_frequency(osc_mode, coarse_val, fine_raw):
+    """Returns the COARSE and FINE display strings of one operator."""
+    if osc_mode == 'RATIO':
+        fine_val = coarse_val + (coarse_val * fine_raw / 100.0)
+        return f"{coarse_val:.2f}", f"{fine_val:.2f}"
+    fine_val = math.pow(1.023293, fine_raw) * coarse_val
+    return f"{coarse_val:.2f}", f"{fine_val:.3f}"
+
+def _build_frequency_table():
+    # Every value a 7-bit coarse/fine byte pair can decode to, in both modes
+    table = {}
+    for fine_raw in range(128):
+        for coarse_byte in range(64):
+            coarse_val = 0.5 if coarse_byte == 0 else float(coarse_byte)
+            table['RATIO', coarse_val, fine_raw] = format_frequency('RATIO', coarse_val, fine_raw)
+        for coarse_val in FIXED_FREQ_MAP.values():
+            table['FIX', coarse_val, fine_raw] = format_frequency('FIX', coarse_val, fine_raw)
+    return table
+
+FREQUENCY_TABLE = {}
+TUNE_TABLE = {tune: f"{tune:+}" for tune in range(-7, 9)}
+
+def render_datasheet(params, bank_name, voice_num):
+    """Table-driven equivalent of generate_datasheet() for bulk output."""
+    if not FREQUENCY_TABLE:
+        FREQUENCY_TABLE.update(_build_frequency_table())
+
+    ops = params['ops']
+    args = [bank_name, voice_num, params['name'],
+            params['algorithm'], params['feedback'], params['osc_sync'], params['transpose']]
+
+    for key in ('eg_rate', 'eg_level'):
+        for index in range(4):
+            args.extend([op[key][index] for op in ops])
+    for key in ('break_point', 'l_depth', 'r_depth', 'l_curve', 'r_curve', 'osc_mode'):
+        args.extend([op[key] for op in ops])
+    args.extend([TUNE_TABLE.get(op['tune']) or f"{op['tune']:+}" for op in ops])
+
+    frequencies = []
+    for op in ops:
+        key = (op['osc_mode'], op['coarse_val'], op['fine_raw'])
+        frequencies.append(FREQUENCY_TABLE.get(key) or format_frequency(*key))
+    args.extend([coarse for coarse, _ in frequencies])
+    args.extend([fine for _, fine in frequencies])
+
+    for key in ('rate_scale', 'key_vel', 'amp_mod_sens', 'level'):
+        args.extend([op[key] for op in ops])
+
+    args.extend([params['lfo_wave'], params['lfo_speed'], params['lfo_delay'], params['lfo_sync'],
+                 params['lfo_pmd'], params['lfo_amd'], params['p_mod_sens']])
+    args.extend(params['pitch_eg_rate'][:4])
+    args.extend(params['pitch_eg_level'][:4])
+    return SHEET_TEMPLATE.format(*args)
+
 def sanitize_filename(name):
-    return re.sub(r'[\\/*?:"<>|]', "", name).strip()
+    return re.sub(r'[\\/*?:"<>|\x00-\x1f]', "", name).strip()
 
-def main():
-    # --- MODIFICATION START (English UI) ---
-    
-    # 1. Check command-line arguments
-    if len(sys.argv) != 2:
-        print("Error: Please provide a SysEx file as an argument.")
-        print("Usage: python dx7sheet.py <filename.syx>")
-        sys.exit(1)
-    
-    filepath = sys.argv[1]
+def is_voice_bulk_frame(frame):
+    """True for a complete DX7 32-voice bulk dump message on any MIDI channel."""
+    return (len(frame) == SYSEX_SIZE and frame[0] == 0xF0 and frame[1] == 0x43
+            and frame[2] & 0xF0 == 0x00 and frame[3:6] == DX7_32_VOICE_HEADER[3:6]
+            and frame[-1] == 0xF7)
 
-    if not os.path.exists(filepath):
-        print(f"Error: File not found: {filepath}")
-        sys.exit(1)
+def iter_buffer_frames(buffer):
+    """
+    Yields (offset, frame) for every F0...F7 SysEx message in a bytes-like
+    buffer with find() (bytes or mmap), skipping anything in between. Each
+    frame is a zero-copy memoryview into the buffer and is only valid until
+    the next iteration; use bytes(frame) to keep it.
+    """
+    view = memoryview(buffer)
+    try:
+        start = buffer.find(b'\xf0')
+        while start != -1:
+            end = buffer.find(b'\xf7', start + 1)
+            if end == -1:
+                break
+            # A new F0 before the F7 means the message was truncated: resync
+            restart = buffer.find(b'\xf0', start + 1, end)
+            if restart != -1:
+                start = restart
+                continue
+            frame = view[start:end + 1]
+            try:
+                yield start, frame
+            finally:
+                frame.release()
+            start = buffer.find(b'\xf0', end + 1)
+    finally:
+        view.release()
 
-    print("--- DX7 Voice Data Sheet Generator (Batch Mode) ---")
-    print(f"Loading file '{filepath}'...")
+def iter_sysex_frames(filepath):
+    """
+    Memory-maps a file and yields (offset, frame) for every SysEx message in
+    it, see iter_buffer_frames().
+    """
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    # 2. Read and validate SysEx file
     try:
-        with open(filepath, 'rb') as f:
-            sysex_data = f.read()
-    except IOError as e:
-        print(f"Error reading the file: {e}")
-        sys.exit(1)
-        
+        yield from iter_buffer_frames(mm)
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            pass  # a caller still holds a view; the mapping goes with it
+
+def iter_voice_banks(filepath):
+    """
+    Yields (offset, voice_bulk_data) for every DX7 32-voice bulk message in a
+    file, which may be a plain bank, a concatenation of dumps or a capture with
+    other SysEx in between. voice_bulk_data is a 4096-byte memoryview.
+    """
+    for offset, frame in iter_sysex_frames(filepath):
+        if is_voice_bulk_frame(frame):
+            voice_bulk_data = frame[6:4102]
+            try:
+                yield offset, voice_bulk_data
+            finally:
+                voice_bulk_data.release()
+
+def read_bank(filepath):
+    """
+    Reads a .syx file and returns the 4096 bytes of packed voice data.
+    Raises ValueError if the file is not a DX7 32-voice bulk dump.
+    """
+    with open(filepath, 'rb') as f:
+        sysex_data = f.read()
+
     if len(sysex_data) != SYSEX_SIZE or not sysex_data.startswith(DX7_32_VOICE_HEADER):
-        print("Error: This does not appear to be a valid Yamaha DX7 32-Voice SysEx file.")
-        sys.exit(1)
-        
-    # 3. Create output directory "Sheet"
-    output_dir = "Sheet"
-    os.makedirs(output_dir, exist_ok=True)
-    print(f"Saving data sheets to '{output_dir}/' directory.")
-    
-    # 4. Process all 32 voices in a loop
-    voice_bulk_data = sysex_data[6:4102]
-    voices = [voice_bulk_data[i:i+128] for i in range(0, 4096, 128)]
-    bank_name = os.path.basename(filepath)
-    
-    print(f"Bank '{bank_name}' loaded. Processing 32 patches...")
+        raise ValueError("This does not appear to be a valid Yamaha DX7 32-Voice SysEx file.")
+    if sysex_data[-1] != 0xF7:
+        raise ValueError("The SysEx message is not terminated by F7.")
+    if sysex_data[4102] != sysex_checksum(sysex_data[6:4102]):
+        raise ValueError("Checksum mismatch: the bank is corrupt.")
+
+    return sysex_data[6:4102]
+
+def sysex_checksum(voice_bulk_data):
+    """Checksum byte of a bulk dump: the two's complement of the data sum, 7 bits."""
+    return -sum(voice_bulk_data) & 0x7F
+
+def build_sysex(voice_bulk_data):
+    """Wraps 4096 bytes of packed voice data into a complete 32-voice SysEx message."""
+    return DX7_32_VOICE_HEADER + bytes(voice_bulk_data) + bytes([sysex_checksum(voice_bulk_data), 0xF7])
+
+def convert_voices(voice_bulk_data, bank_name, output_dir, verbose=False, skip=(), cache=None,
+                   stats=NULL_STATS, sheets=None, parsed=None):
+    """
+    Converts the 32 voices of one bulk message into data sheets in output_dir,
+    leaving out the 1-based voice numbers in skip.
+    cache is an optional (previous, produced) pair of {sheet path: voice hash}
+    dicts for incremental builds: voices whose sheet exists with the same hash
+    are not parsed or written again, and every sheet of this run is recorded
+    in produced. stats receives the parse/render/write timings and counters.
+    If a sheets list is given, (path, text) pairs are appended to it for an
+    archive sink instead of writing files.
+    parsed is an optional {voice hash: parsed params} mapping that is looked
+    up before parsing a voice and filled with every voice parsed.
+    Returns the number of sheets written and a list of per-patch errors.
+    """
+    if sheets is None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if verbose:
+        print(f"Saving data sheets to '{output_dir}/' directory.")
+        print(f"Bank '{bank_name}' loaded. Processing 32 patches...")
+    written = 0
+    errors = []
 
     for i in range(32):
-        selected_voice_data = voices[i]
         voice_num = i + 1  # 1-based index for filenames and display
-        
-        # Parse patch
-        parsed_params = parse_single_voice(selected_voice_data)
-        
-        # Generate datasheet text
-        datasheet = generate_datasheet(parsed_params, bank_name, voice_num)
-        
+        stats.count('voices')
+        if voice_num in skip:
+            if verbose:
+                print(f"  ({voice_num:02d}/32) Skipped: duplicate of an earlier patch")
+            continue
+
+        voice_data = voice_bulk_data[i * 128:(i + 1) * 128]
+
         # Create filename (e.g., "01_E.PIANO 1.txt")
-        patch_name = sanitize_filename(parsed_params['name'])
+        patch_name = sanitize_filename(bytes(voice_data[118:128]).decode('ascii', errors='ignore'))
         filename = f"{voice_num:02d}_{patch_name}.txt"
         full_path = os.path.join(output_dir, filename)
-        
-        # 5. Save the file
+
+        if cache is not None or parsed is not None:
+            voice_hash = hashlib.blake2b(voice_data, digest_size=16).hexdigest()
+        if cache is not None:
+            previous, produced = cache
+            if previous.get(full_path) == voice_hash and os.path.exists(full_path):
+                produced[full_path] = voice_hash
+                continue
+
+        with stats.stage('parse'):
+            parsed_params = parsed.get(voice_hash) if parsed is not None else None
+            if parsed_params is None:
+                try:
+                    parsed_params = parse_single_voice(voice_data)
+                except KeyError:
+                    # Only an out-of-range LFO wave makes the parser fail
+                    errors.append(f"patch {voice_num} ('{patch_name}'): LFO wave out of range")
+                    if verbose:
+                        print(f"  ({voice_num:02d}/32) Error: LFO wave out of range")
+                    continue
+                if parsed is not None:
+                    parsed[voice_hash] = parsed_params
+        with stats.stage('render'):
+            datasheet = render_datasheet(parsed_params, bank_name, voice_num)
+
+        if sheets is not None:
+            sheets.append((full_path, datasheet))
+            stats.count('sheets')
+            written += 1
+            continue
+
         try:
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(datasheet)
-            print(f"  ({voice_num:02d}/32) Saved: '{full_path}'")
+            with stats.stage('write'):
+                with open(full_path, 'w', encoding='utf-8') as f:
+                    stats.count('bytes_written', f.write(datasheet))
+            stats.count('sheets')
+            written += 1
+            if cache is not None:
+                produced[full_path] = voice_hash
+            if verbose:
+                print(f"  ({voice_num:02d}/32) Saved: '{full_path}'")
         except IOError as e:
-            print(f"\nError saving patch {voice_num} ('{patch_name}'): {e}")
-    
-    print("\n--- Conversion complete! ---")
-    
-    # --- MODIFICATION END ---
+            errors.append(f"patch {voice_num} ('{patch_name}'): {e}")
+            if verbose:
+                print(f"\nError saving patch {voice_num} ('{patch_name}'): {e}")
+
+    return written, errors
+
+def convert_bank(filepath, output_dir, verbose=False, skip=(), cache=None, stats=NULL_STATS,
+                 sheets=None, lenient=False, parsed=None):
+    """
+    Converts every 32-voice bulk message found in a file. The first bank goes
+    to output_dir, further banks of a concatenated dump to 'bankNN' below it.
+    skip holds (bank number, voice number) pairs that are not converted and
+    cache, stats, sheets and parsed are passed on to convert_voices().
+    Banks with a bad checksum are rejected unless lenient is set, in which
+    case every bank is converted with its out-of-range values clamped.
+    Returns the number of sheets written and a list of per-patch errors.
+    Raises ValueError if the file contains no DX7 32-voice bulk message.
+    """
+    written = 0
+    errors = []
+    bank_count = 0
+
+    frames = (found for found in iter_sysex_frames(filepath) if is_voice_bulk_frame(found[1]))
+    while True:
+        with stats.stage('read_validate'):
+            found = next(frames, None)
+            if found is not None:
+                voice_bulk_data = found[1][6:4102]
+                stored, checksum = found[1][4102], sysex_checksum(voice_bulk_data)
+        if found is None:
+            break
+        bank_count += 1
+        if lenient:
+            from dx7validate import repair_voice_data
+            voice_bulk_data = repair_voice_data(voice_bulk_data)
+        elif stored != checksum:
+            error = (f"bank {bank_count}: checksum mismatch (stored 0x{stored:02X}, computed "
+                     f"0x{checksum:02X}), use --lenient to convert it anyway")
+            errors.append(error)
+            if verbose:
+                print(f"Error: {error}")
+            voice_bulk_data.release()
+            continue
+        bank_name = os.path.basename(filepath)
+        bank_dir = output_dir
+        if bank_count > 1:
+            bank_name = f"{bank_name} #{bank_count}"
+            bank_dir = os.path.join(output_dir, f"bank{bank_count:02d}")
+        bank_skip = {voice_num for bank_num, voice_num in skip if bank_num == bank_count}
+        bank_written, bank_errors = convert_voices(voice_bulk_data, bank_name, bank_dir, verbose,
+                                                   bank_skip, cache, stats, sheets, parsed)
+        if not lenient:
+            voice_bulk_data.release()
+        written += bank_written
+        errors.extend(bank_errors)
+
+    if not bank_count:
+        raise ValueError("This does not appear to be a valid Yamaha DX7 32-Voice SysEx file.")
+
+    return written, errors
+
+def file_digest(filepath):
+    h = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def load_manifest(output_dir):
+    """
+    Returns the sources recorded by the last incremental build in output_dir,
+    or {} if there is none or it was made by another FORMAT_VERSION.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        return {}
+    if manifest.get('version') != FORMAT_VERSION:
+        return {}
+    return manifest['sources']
+
+def save_manifest(output_dir, sources):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump({'version': FORMAT_VERSION, 'sources': sources}, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def remove_outputs(root, relpaths):
+    """Deletes sheets below root, and the subdirectories this leaves empty."""
+    for relpath in relpaths:
+        try:
+            os.remove(os.path.join(root, relpath))
+        except OSError:
+            continue
+        directory = os.path.dirname(relpath)
+        while directory:
+            try:
+                os.rmdir(os.path.join(root, directory))
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+def convert_bank_cached(filepath, output_dir, root, previous=None, verbose=False, skip=(),
+                        stats=NULL_STATS, lenient=False, parsed=None):
+    """
+    Incremental variant of convert_bank() for a build whose manifest lives in
+    root. previous is the manifest entry of the file from the last run. An
+    unchanged file is not parsed at all; otherwise only voices whose bytes
+    changed are rendered, and sheets the file no longer produces are deleted.
+    Returns the number of sheets written, the per-patch errors and the new
+    manifest entry.
+    """
+    with stats.stage('hash'):
+        digest = file_digest(filepath)
+    skip_list = sorted([bank_num, voice_num] for bank_num, voice_num in skip)
+    bank_dir = os.path.relpath(output_dir, root)
+
+    if (previous and previous['hash'] == digest and previous['skip'] == skip_list
+            and previous['dir'] == bank_dir and previous.get('lenient', False) == lenient
+            and all(os.path.exists(os.path.join(root, relpath)) for relpath in previous['outputs'])):
+        if verbose:
+            print("Bank is unchanged, all data sheets are up to date.")
+        return 0, [], previous
+
+    old_outputs = {os.path.join(root, relpath): voice_hash
+                   for relpath, voice_hash in (previous['outputs'] if previous else {}).items()}
+    produced = {}
+    written, errors = convert_bank(filepath, output_dir, verbose, skip, (old_outputs, produced), stats,
+                                   lenient=lenient, parsed=parsed)
+    remove_outputs(root, [os.path.relpath(path, root) for path in old_outputs if path not in produced])
+
+    entry = {'hash': digest, 'skip': skip_list, 'dir': bank_dir, 'lenient': lenient,
+             'outputs': {os.path.relpath(path, root): voice_hash for path, voice_hash in produced.items()}}
+    return written, errors, entry
+
+def collect_syx_files(paths):
+    """
+    Expands files, directories (searched recursively) and glob patterns into
+    a sorted list of (filepath, relative name) pairs. The relative name is used
+    to give every bank its own output subdirectory.
+    Returns the list of banks and the list of arguments that matched nothing.
+    """
+    found = []
+    missing = []
+    seen = set()
+
+    def add(filepath, relname):
+        key = os.path.normcase(os.path.abspath(filepath))
+        if key not in seen:
+            seen.add(key)
+            found.append((filepath, relname))
+
+    def walk(directory):
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.syx'):
+                    filepath = os.path.join(root, name)
+                    add(filepath, os.path.relpath(filepath, directory))
+
+    def relative_to_cwd(filepath):
+        relname = os.path.relpath(os.path.abspath(filepath))
+        return os.path.basename(filepath) if relname.startswith(os.pardir) else relname
+
+    for path in paths:
+        if os.path.isdir(path):
+            walk(path)
+        elif os.path.isfile(path):
+            add(path, relative_to_cwd(path))
+        else:
+            matches = sorted(glob.glob(path, recursive=True))
+            if not matches:
+                missing.append(path)
+            for match in matches:
+                if os.path.isdir(match):
+                    walk(match)
+                elif match.lower().endswith('.syx'):
+                    add(match, relative_to_cwd(match))
+
+    return found, missing
+
+def convert_file(filepath, output_dir, verbose=False, skip=(), root=None, previous=None,
+                 stats=NULL_STATS, sheets=None, lenient=False, scan_captures=False):
+    """
+    Converts one file with convert_bank(), or with convert_bank_cached() when
+    root is given, and returns (written, errors, manifest entry or None).
+    sheets collects the rendered sheets for an archive sink (not incremental).
+    The file is probed first: files with a single-voice dump near the start
+    get one sheet, and files without a DX7 header there raise ValueError.
+    With scan_captures, larger files without one are scanned for banks in full.
+    """
+    from dx7formats import probe, convert_voice_file
+
+    with stats.stage('read_validate'):
+        fmt = probe(filepath, scan_captures)
+    if fmt.kind is None:
+        raise ValueError(f"This does not appear to be a valid Yamaha DX7 SysEx file ({fmt.description}).")
+    if stats.enabled:
+        stats.count('files')
+        stats.count('bytes_read', os.path.getsize(filepath))
+    if fmt.kind == 'voice':
+        return convert_voice_file(filepath, output_dir, verbose, root, previous, stats, sheets, lenient)
+    if root is None:
+        written, errors = convert_bank(filepath, output_dir, verbose, skip, stats=stats, sheets=sheets,
+                                       lenient=lenient)
+        return written, errors, None
+    return convert_bank_cached(filepath, output_dir, root, previous, verbose, skip, stats, lenient)
+
+def _convert_job(filepath, output_dir, skip=(), root=None, previous=None, profile=False,
+                 collect=False, lenient=False, scan_captures=False):
+    # Worker entry point: never raises, so one bad bank cannot stop the pool.
+    result = {'path': filepath, 'written': 0, 'errors': [], 'error': None, 'entry': None,
+              'stats': None, 'sheets': None}
+    stats = Stats() if profile else NULL_STATS
+    sheets = [] if collect else None
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        result['written'], result['errors'], result['entry'] = convert_file(
+            filepath, output_dir, skip=skip, root=root, previous=previous, stats=stats, sheets=sheets,
+            lenient=lenient, scan_captures=scan_captures)
+        if collect:
+            # Archive member names always use forward slashes
+            result['sheets'] = [(path.replace(os.sep, '/'), text) for path, text in sheets]
+    except (IOError, ValueError) as e:
+        result['error'] = str(e)
+    if profile:
+        result['stats'] = stats.snapshot()
+        result['wall'] = time.perf_counter() - wall
+        result['cpu'] = time.process_time() - cpu
+    return result
+
+def run_batch(banks, output_dir, jobs=1, skips=None, manifest=None, stats=None, writer=None,
+              lenient=False, scan_captures=False):
+    """
+    Converts many banks, each into its own subdirectory of output_dir (a
+    single bank directly into it), using a process pool when jobs > 1.
+    skips maps absolute file paths to the (bank number, voice number) pairs
+    to leave out. If a manifest dict from load_manifest() is given, the build
+    is incremental and the manifest is updated in place. If a Stats object is
+    given, every bank is profiled and merged into it. With a SinkWriter from
+    dx7sinks, the sheets go to its archive instead of output_dir. lenient
+    converts banks with a bad checksum, see convert_bank(); scan_captures
+    scans files without a DX7 header near the start, see convert_file().
+    Prints one progress line per bank and returns the number of banks that
+    failed.
+    """
+    skips = skips or {}
+    total = len(banks)
+    root = output_dir if manifest is not None else None
+    base = "" if writer is not None else output_dir
+    tasks = [(filepath, base if total == 1 else os.path.join(base, os.path.splitext(relname)[0]),
+              skips.get(os.path.abspath(filepath), set()), root,
+              manifest.get(os.path.abspath(filepath)) if manifest is not None else None,
+              stats is not None, writer is not None, lenient, scan_captures)
+             for filepath, relname in banks]
+    failed = 0
+    sheets = 0
+
+    def report(done, result):
+        nonlocal failed, sheets
+        filepath, written, errors, error = result['path'], result['written'], result['errors'], result['error']
+        sheets += written
+        if result['entry'] is not None:
+            manifest[os.path.abspath(filepath)] = result['entry']
+        if stats is not None:
+            stats.add_bank(filepath, result['wall'], result['cpu'], result['stats'])
+        if result['sheets']:
+            writer.put(result['sheets'])
+        if error or errors:
+            failed += 1
+            print(f"[{done:>{len(str(total))}}/{total}] FAILED {filepath}: {error or '; '.join(errors)}")
+        else:
+            skipped = len(skips.get(os.path.abspath(filepath), ()))
+            note = f", {skipped} duplicates skipped" if skipped else ""
+            if result['entry'] is not None and not written:
+                note += ", up to date"
+            print(f"[{done:>{len(str(total))}}/{total}] OK     {filepath} ({written} sheets{note})")
+
+    if jobs == 1 or total == 1:
+        for done, task in enumerate(tasks, 1):
+            report(done, _convert_job(*task))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_convert_job, *task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                report(done, future.result())
+
+    print(f"\n--- Converted {total - failed} of {total} banks ({sheets} sheets), {failed} failed. ---")
+    return failed
+
+def prune_manifest(output_dir, manifest):
+    """Deletes the sheets of sources that no longer exist and drops their entries."""
+    for source in [source for source in manifest if not os.path.exists(source)]:
+        remove_outputs(output_dir, manifest.pop(source)['outputs'])
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Batch-converts Yamaha DX7 32-voice SysEx banks into text data sheets.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('-o', '--output', default="Sheet",
+                        help="output directory (default: Sheet), or a .zip, .tar, .tar.gz or .txt "
+                             "file to collect all sheets in one archive")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="number of worker processes, 0 = one per CPU core (default: 1)")
+    parser.add_argument('--dedup', action='store_true',
+                        help="skip sheets of exact duplicates of voices converted earlier in the run")
+    parser.add_argument('--index', default=".dx7index.json",
+                        help="voice index used by --dedup (default: .dx7index.json)")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"only regenerate sheets whose bank or renderer changed, tracked in "
+                             f"'{MANIFEST_FILE}' in the output directory")
+    parser.add_argument('--lenient', action='store_true',
+                        help="convert banks with a bad checksum instead of rejecting them, clamping "
+                             "out-of-range values in memory")
+    parser.add_argument('--scan-captures', action='store_true',
+                        help="scan files without a DX7 header in their first 64 KB for banks in "
+                             "full instead of skipping them")
+    parser.add_argument('--profile', '--stats', action='store_true',
+                        help="print per-stage timings, counters and the slowest banks at the end")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="write the profile as JSON to FILE (implies --profile)")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    if not banks:
+        print("Error: No .syx files found.")
+        sys.exit(1)
+
+    output_dir = args.output
+
+    skips = {}
+    if args.dedup:
+        import dx7index
+        index = dx7index.VoiceIndex(args.index)
+        index.update([filepath for filepath, _ in banks], prune=False)
+        index.save()
+        skips = index.duplicate_skips([filepath for filepath, _ in banks])
+
+    manifest = load_manifest(output_dir) if args.incremental else None
+    stats = Stats() if args.profile or args.trace else None
+    started = time.perf_counter()
+
+    def print_profile():
+        if stats is not None:
+            wall = time.perf_counter() - started
+            stats.finish(wall, args.trace)
+            print("\n" + stats.summary(wall))
+
+    sink = None
+    if manifest is None:
+        import dx7sinks
+        try:
+            sink = dx7sinks.open_sink(output_dir)
+        except (IOError, OSError) as e:
+            print(f"Error creating '{output_dir}': {e}")
+            sys.exit(1)
+    elif os.path.splitext(output_dir)[1].lower() in ('.zip', '.tar', '.gz', '.tgz', '.txt'):
+        print("Error: --incremental needs an output directory, not an archive.")
+        sys.exit(1)
+
+    if sink is not None:
+        print("--- DX7 Voice Data Sheet Generator (Batch Mode) ---")
+        print(f"Found {len(banks)} banks, collecting the sheets in '{output_dir}'.")
+        writer = dx7sinks.SinkWriter(sink)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        failed = run_batch(banks, output_dir, jobs, skips, None, stats, writer, args.lenient,
+                           args.scan_captures)
+        error = writer.close()
+        if error:
+            print(f"Error writing '{output_dir}': {error}")
+        if stats is not None:
+            stats.count('bytes_written', writer.bytes_written)
+        print_profile()
+        sys.exit(1 if failed or missing or error else 0)
+
+    # A single bank keeps the original flat "Sheet/NN_NAME.txt" layout.
+    if len(banks) == 1 and not missing:
+        filepath = banks[0][0]
+        print("--- DX7 Voice Data Sheet Generator (Batch Mode) ---")
+        print(f"Loading file '{filepath}'...")
+        skip = skips.get(os.path.abspath(filepath), ())
+        root = output_dir if manifest is not None else None
+        try:
+            wall, cpu = time.perf_counter(), time.process_time()
+            written, errors, entry = convert_file(
+                filepath, output_dir, verbose=True, skip=skip, root=root,
+                previous=manifest.get(os.path.abspath(filepath)) if root else None,
+                stats=stats or NULL_STATS, lenient=args.lenient, scan_captures=args.scan_captures)
+            if stats is not None:
+                stats.add_bank(filepath, time.perf_counter() - wall, time.process_time() - cpu)
+            if manifest is not None:
+                manifest[os.path.abspath(filepath)] = entry
+                save_manifest(output_dir, prune_manifest(output_dir, manifest))
+        except IOError as e:
+            print(f"Error reading the file: {e}")
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if errors:
+            # The errors were printed as they occurred; summarise like the batch path
+            print(f"\n--- Converted 0 of 1 banks ({written} sheets), 1 failed. ---")
+        else:
+            print("\n--- Conversion complete! ---")
+        print_profile()
+        sys.exit(1 if errors else 0)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    print("--- DX7 Voice Data Sheet Generator (Batch Mode) ---")
+    print(f"Found {len(banks)} banks, converting with {jobs} worker(s) into '{output_dir}/'.")
+    failed = run_batch(banks, output_dir, jobs, skips, manifest, stats, lenient=args.lenient,
+                       scan_captures=args.scan_captures)
+    if manifest is not None:
+        save_manifest(output_dir, prune_manifest(output_dir, manifest))
+    print_profile()
+    sys.exit(1 if failed or missing else 0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,125 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7sinks.py
+# Archive output sinks for batch runs. Instead of one small file per voice,
+# the sheets of a whole corpus can be streamed into a single zip or tar
+# archive, or into one concatenated text file with one sheet per page
+# (pages are separated by form feeds). The sink is chosen by the extension
+# of the output path; anything else stays a plain 'Sheet' directory.
+#
+# python dx7sheet_32.py -j 8 -o Sheets.zip Archive/
+# python dx7sheet_32.py -o Sheets.tar.gz Archive/
+# python dx7sheet_32.py -o Sheets.txt Archive/
+#
+# Workers only render; a dedicated writer thread in the main process takes
+# the sheets of each finished bank and writes them to the archive in bulk.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import io
+import time
+import queue
+import tarfile
+import zipfile
+import threading
+
+class ZipSink:
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def write(self, name, text):
+        data = text.encode('utf-8')
+        self.archive.writestr(name, data)
+        return len(data)
+
+    def close(self):
+        self.archive.close()
+
+class TarSink:
+    def __init__(self, path):
+        mode = 'w|gz' if path.lower().endswith(('.tar.gz', '.tgz')) else 'w|'
+        self.archive = tarfile.open(path, mode)
+        self.mtime = time.time()
+
+    def write(self, name, text):
+        data = text.encode('utf-8')
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = self.mtime
+        self.archive.addfile(info, io.BytesIO(data))
+        return len(data)
+
+    def close(self):
+        self.archive.close()
+
+class TextSink:
+    """All sheets in one text file, one sheet per page."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8', buffering=1 << 20)
+        self.pages = 0
+
+    def write(self, name, text):
+        page = ("\f" if self.pages else "") + text + "\n"
+        self.pages += 1
+        return self.file.write(page)
+
+    def close(self):
+        self.file.close()
+
+SINKS = {'.zip': ZipSink, '.tar': TarSink, '.tar.gz': TarSink, '.tgz': TarSink, '.txt': TextSink}
+
+def open_sink(path):
+    """Returns an archive sink for the output path, or None for a directory."""
+    lower = path.lower()
+    for extension, sink in SINKS.items():
+        if lower.endswith(extension):
+            return sink(path)
+    return None
+
+class SinkWriter(threading.Thread):
+    """
+    Writer thread in front of a sink. put() hands over the sheets of one
+    bank as a list of (archive name, text) pairs and returns immediately;
+    close() writes what is left, closes the sink and returns the first
+    write error, if any.
+    """
+
+    def __init__(self, sink, max_pending=64):
+        super().__init__(name="dx7-sink-writer", daemon=True)
+        self.sink = sink
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.error = None
+        self.bytes_written = 0
+        self.start()
+
+    def put(self, sheets):
+        self.pending.put(sheets)
+
+    def run(self):
+        while True:
+            sheets = self.pending.get()
+            if sheets is None:
+                break
+            if self.error:
+                continue  # keep draining so producers never block
+            try:
+                for name, text in sheets:
+                    self.bytes_written += self.sink.write(name, text)
+            except Exception as e:
+                # Any error: if this thread died, producers would block on the full queue
+                self.error = e
+
+    def close(self):
+        self.pending.put(None)
+        self.join()
+        try:
+            self.sink.close()
+        except Exception as e:
+            self.error = self.error or e
+        return self.error
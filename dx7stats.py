@@ -0,0 +1,162 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7stats.py
+# Opt-in timing and counter instrumentation for batch runs. A Stats object
+# records wall and CPU time per stage (read/validate, parse, render, write),
+# counters such as bytes read and written or voices handled, and the time
+# of every bank. NULL_STATS is used when profiling is off: its stage() hands
+# back one shared no-op context manager, so the hooks in the conversion
+# code cost next to nothing.
+#
+# python dx7sheet_32.py --profile Archive/              prints a summary table
+# python dx7sheet_32.py --trace trace.json Archive/     also writes a JSON trace
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import json
+import time
+import heapq
+
+# Callbacks registered with register_hook(). Each receives an event dict:
+#   {'type': 'bank', 'path': ..., 'wall': ..., 'cpu': ..., 'stages': ..., 'counters': ...}
+# for every finished bank and {'type': 'summary', ...} once at the end of a run.
+# They are called in the main process, also when the banks ran in a pool.
+HOOKS = []
+
+def register_hook(callback):
+    HOOKS.append(callback)
+    return callback
+
+def unregister_hook(callback):
+    HOOKS.remove(callback)
+
+def fire(event):
+    for callback in HOOKS:
+        callback(event)
+
+class _StageTimer:
+    __slots__ = ('stats', 'name', 'wall', 'cpu')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.add_stage(self.name, time.perf_counter() - self.wall, time.process_time() - self.cpu)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class NullStats:
+    """Stand-in used when profiling is off; every call is a no-op."""
+
+    enabled = False
+
+    def stage(self, name):
+        return _NULL_TIMER
+
+    def count(self, name, amount=1):
+        pass
+
+NULL_STATS = NullStats()
+
+class Stats:
+    """Per-stage wall/CPU times, counters and per-bank times of one run."""
+
+    enabled = True
+
+    def __init__(self, slowest=10):
+        self.stages = {}      # name -> [calls, wall seconds, cpu seconds]
+        self.counters = {}
+        self.banks = []       # [path, wall seconds, cpu seconds]
+        self.slowest = slowest
+
+    def stage(self, name):
+        return _StageTimer(self, name)
+
+    def add_stage(self, name, wall, cpu, calls=1):
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [calls, wall, cpu]
+        else:
+            entry[0] += calls
+            entry[1] += wall
+            entry[2] += cpu
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Plain-data copy that can be sent back from a worker process."""
+        return {'stages': {name: list(entry) for name, entry in self.stages.items()},
+                'counters': dict(self.counters)}
+
+    def add_bank(self, path, wall, cpu, snapshot=None):
+        """Records a finished bank, merges its worker snapshot and fires the hooks."""
+        self.banks.append([path, wall, cpu])
+        if snapshot is not None:
+            for name, (calls, stage_wall, stage_cpu) in snapshot['stages'].items():
+                self.add_stage(name, stage_wall, stage_cpu, calls)
+            for name, amount in snapshot['counters'].items():
+                self.count(name, amount)
+        if HOOKS:
+            fire({'type': 'bank', 'path': path, 'wall': wall, 'cpu': cpu,
+                  **(snapshot or {'stages': {}, 'counters': {}})})
+
+    def slowest_banks(self):
+        return heapq.nlargest(self.slowest, self.banks, key=lambda bank: bank[1])
+
+    def to_dict(self, wall=None):
+        return {
+            'wall': wall,
+            'stages': {name: {'calls': calls, 'wall': round(stage_wall, 6), 'cpu': round(stage_cpu, 6)}
+                       for name, (calls, stage_wall, stage_cpu) in self.stages.items()},
+            'counters': self.counters,
+            'banks': [{'path': path, 'wall': round(bank_wall, 6), 'cpu': round(bank_cpu, 6)}
+                      for path, bank_wall, bank_cpu in self.banks],
+        }
+
+    def finish(self, wall, trace_path=None):
+        """Fires the summary hook and writes the JSON trace if a path is given."""
+        if HOOKS:
+            fire({'type': 'summary', **self.to_dict(wall)})
+        if trace_path:
+            with open(trace_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(wall), f, indent=1)
+
+    def summary(self, wall=None):
+        """Returns the summary table as text."""
+        total = sum(entry[1] for entry in self.stages.values()) or 1.0
+        lines = [f"{'STAGE':<16}{'CALLS':>9}{'WALL s':>11}{'CPU s':>11}{'% WALL':>9}", "-" * 56]
+        for name, (calls, stage_wall, stage_cpu) in self.stages.items():
+            lines.append(f"{name:<16}{calls:>9}{stage_wall:>11.4f}{stage_cpu:>11.4f}"
+                         f"{stage_wall / total * 100:>8.1f}%")
+        lines.append("-" * 56)
+        if wall is not None:
+            lines.append(f"Elapsed: {wall:.3f}s (stage times are summed over all workers)")
+        lines.append("   ".join(f"{name.replace('_', ' ').capitalize()}: {amount:,}"
+                                for name, amount in self.counters.items()))
+        slowest = self.slowest_banks()
+        if slowest:
+            lines.append("Slowest banks:")
+            lines.extend(f"  {bank_wall:8.4f}s  {path}" for path, bank_wall, _ in slowest)
+        return "\n".join(lines)
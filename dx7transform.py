@@ -0,0 +1,396 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7transform.py
+# Voice encoder and bulk transform engine. encode_voice() is the inverse of
+# parse_single_voice(): it packs a parsed voice back into its 128 bytes,
+# including the bit-packed bytes 11, 12, 13, 15, 110, 111 and 116. The
+# transform pipeline decodes a whole corpus into columns with dx7vector,
+# applies declarative edits to all voices at once, packs the columns back
+# and writes valid banks with a correct checksum.
+#
+# python dx7transform.py Archive/ -o Edited/ --normalize "op*_level=99"
+# python dx7transform.py Archive/ -o Edited/ --clamp lfo_pmd=0:50 --prefix "FM "
+# python dx7transform.py Archive/ -o Edited/ --transforms edits.json
+# python dx7transform.py Archive/ -o Archive/ --in-place --set lfo_delay=0
+#
+# A transform is a dict naming the columns it applies to (wildcards allowed,
+# e.g. "op*_eg_rate?") and one operation: set, add, scale, clamp [lo, hi],
+# normalize (shifts the matched columns of each voice so their maximum hits
+# the target) or, for "name", prefix. Values are in decoded units and are
+# kept inside the range of each parameter.
+#
+# Every field is checked against the range dx7validate allows, so the
+# packed bytes are valid 7-bit SysEx data. Bits the decoder does not expose
+# (transpose, break points shown as N/A, unused bits, the padding of the
+# name) are kept from the original voice, and so is everything else in the
+# source files: other SysEx messages and the MIDI channel of each dump.
+# An output that is the source file itself is refused unless --in-place is
+# given.
+# Feedback is packed in byte 111 as on the DX7; parse_single_voice() reads
+# it from byte 110, so a changed feedback does not survive a round trip
+# through the decoder. It is kept from the original voice unless it
+# changed, and transforms cannot edit it.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import fnmatch
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from dx7sheet_32 import (NOTE_NAMES, CURVE_MODES, LFO_WAVES, FIXED_FREQ_MAP,
+                         collect_syx_files, parse_single_voice, build_sysex, sysex_checksum,
+                         iter_buffer_frames, is_voice_bulk_frame)
+from dx7vector import OPERATOR_FIELDS, GLOBAL_FIELDS, operator_offset
+from dx7validate import VOICE_FIELDS
+
+CURVE_CODES = {name: code for code, name in CURVE_MODES.items()}
+LFO_WAVE_CODES = {name: code for code, name in LFO_WAVES.items()}
+FIXED_CODES = {value: code for code, value in FIXED_FREQ_MAP.items()}
+
+# Voice used for the bits a parsed voice does not define when no base is
+# given: everything zero, transpose C3 (24), name blank
+INIT_VOICE = bytes(117) + bytes([24]) + b" " * 10
+
+def _maximum(position, shift):
+    for field_shift, _, maximum, _ in VOICE_FIELDS[position]:
+        if field_shift == shift:
+            return maximum
+    return None
+
+def _layout():
+    # (column, byte position in the voice, shift, mask, bias, highest raw
+    # value) for every field the decoder reads at its DX7 location
+    layout = []
+    for op_num in range(1, 7):
+        for name, offset, shift, mask, bias in OPERATOR_FIELDS:
+            position = operator_offset(op_num) + offset
+            layout.append((f"op{op_num}_{name}", position, shift, mask, bias, _maximum(position, shift)))
+    for name, position, shift, mask, bias in GLOBAL_FIELDS:
+        if name != 'feedback':
+            layout.append((name, position, shift, mask, bias, _maximum(position, shift)))
+    return layout
+
+FIELD_LAYOUT = _layout()
+FEEDBACK_POSITION = 111   # bits 0-2
+
+# --- Encoder ---
+
+def _name_bytes(name, base):
+    if base is not None and bytes(base[118:128]).decode('ascii', errors='ignore').strip() == name:
+        return bytes(base[118:128])
+    try:
+        data = name.encode('ascii')
+    except UnicodeEncodeError:
+        raise ValueError(f"Voice name '{name}' is not ASCII.")
+    if len(data) > 10:
+        raise ValueError(f"Voice name '{name}' is longer than 10 characters.")
+    return data.ljust(10)
+
+def raw_fields(params, base=None):
+    """
+    Returns {column: value} for every FIELD_LAYOUT column of a parsed voice,
+    in the decoded units of dx7vector. base is the original 128 bytes, used
+    where the parsed value does not determine the raw one.
+    """
+    base_ops = parse_single_voice(base)['ops'] if base is not None else None
+    values = {}
+    for op_num, op in enumerate(params['ops'], 1):
+        prefix = f"op{op_num}_"
+        block = operator_offset(op_num)
+        for i in range(4):
+            values[f"{prefix}eg_rate{i + 1}"] = op['eg_rate'][i]
+            values[f"{prefix}eg_level{i + 1}"] = op['eg_level'][i]
+
+        if op['break_point'] in NOTE_NAMES:
+            values[prefix + 'break_point'] = NOTE_NAMES.index(op['break_point'])
+        elif base is not None and base_ops[op_num - 1]['break_point'] == op['break_point']:
+            values[prefix + 'break_point'] = base[block + 8]
+        else:
+            raise ValueError(f"OP{op_num} break point '{op['break_point']}' cannot be encoded.")
+
+        for key in ('l_depth', 'r_depth', 'rate_scale', 'tune', 'key_vel', 'amp_mod_sens',
+                    'level', 'fine_raw'):
+            values[prefix + key] = op[key]
+        values[prefix + 'l_curve'] = CURVE_CODES[op['l_curve']]
+        values[prefix + 'r_curve'] = CURVE_CODES[op['r_curve']]
+        values[prefix + 'osc_mode'] = 1 if op['osc_mode'] == 'FIX' else 0
+
+        # A fixed frequency only decodes the two lowest coarse bits
+        base_op = base_ops[op_num - 1] if base is not None else None
+        if (base_op is not None and base_op['osc_mode'] == op['osc_mode']
+                and base_op['coarse_val'] == op['coarse_val']):
+            values[prefix + 'coarse'] = base[block + 15] >> 1
+        elif op['osc_mode'] == 'FIX':
+            if op['coarse_val'] not in FIXED_CODES:
+                raise ValueError(f"OP{op_num} fixed frequency {op['coarse_val']} cannot be encoded.")
+            values[prefix + 'coarse'] = FIXED_CODES[op['coarse_val']]
+        else:
+            values[prefix + 'coarse'] = 0 if op['coarse_val'] == 0.5 else int(op['coarse_val'])
+
+    for i in range(4):
+        values[f"pitch_eg_rate{i + 1}"] = params['pitch_eg_rate'][i]
+        values[f"pitch_eg_level{i + 1}"] = params['pitch_eg_level'][i]
+    for key in ('algorithm', 'lfo_speed', 'lfo_delay', 'lfo_pmd', 'lfo_amd', 'p_mod_sens'):
+        values[key] = params[key]
+    values['osc_sync'] = 1 if params['osc_sync'] == 'ON' else 0
+    values['lfo_sync'] = 1 if params['lfo_sync'] == 'ON' else 0
+    values['lfo_wave'] = LFO_WAVE_CODES[params['lfo_wave']]
+    return values
+
+def encode_voice(params, base=None):
+    """
+    Packs a voice as returned by parse_single_voice() (or a dx7model.Voice)
+    into 128 bytes. Bits the parsed form does not define are taken from
+    base, the original 128 bytes, or from INIT_VOICE. Feedback goes to byte
+    111 bits 0-2, unless it equals the feedback parsed from base.
+    Raises ValueError for values outside the range of their parameter;
+    values left as they are in base are written unchanged.
+    """
+    values = raw_fields(params, base)
+    data = bytearray(base if base is not None else INIT_VOICE)
+    for column, position, shift, mask, bias, maximum in FIELD_LAYOUT:
+        raw = values[column] - bias
+        if base is not None and raw == (base[position] >> shift) & mask:
+            continue
+        if not 0 <= raw <= maximum:
+            raise ValueError(f"{column} = {values[column]} is out of range "
+                             f"({bias}-{maximum + bias}).")
+        data[position] = (data[position] & ~(mask << shift) & 0xFF) | (raw << shift)
+
+    if base is None or params['feedback'] != parse_single_voice(base)['feedback']:
+        if params['feedback'] not in range(8):
+            raise ValueError(f"feedback = {params['feedback']} is out of range (0-7).")
+        data[FEEDBACK_POSITION] = (data[FEEDBACK_POSITION] & ~7) | params['feedback']
+    data[118:128] = _name_bytes(params['name'], base)
+    return bytes(data)
+
+def encode_bank(voices, bases=None):
+    """Packs 32 parsed voices into a complete 4104-byte bank with checksum."""
+    if len(voices) != 32:
+        raise ValueError(f"A bank has 32 voices, not {len(voices)}.")
+    bases = bases or [None] * 32
+    return build_sysex(b"".join(encode_voice(params, base) for params, base in zip(voices, bases)))
+
+def encode_columns(columns, voices):
+    """
+    Vectorized encoder: writes the dx7vector columns back into a copy of
+    the (M, 128) voices array they were decoded from and returns it.
+    Feedback is not written, as in encode_voice() when it is unchanged.
+    """
+    if np is None:
+        raise ImportError("The transform engine requires NumPy: pip install numpy")
+    encoded = np.array(voices, dtype=np.uint8).reshape(-1, 128)
+    for column, position, shift, mask, bias, maximum in FIELD_LAYOUT:
+        raw = np.asarray(columns[column]).astype(np.int16) - bias
+        changed = raw != (encoded[:, position] >> shift) & mask
+        if (changed & ((raw < 0) | (raw > maximum))).any():
+            raise ValueError(f"{column} has values out of range ({bias}-{maximum + bias}).")
+        keep = encoded[:, position] & (~(mask << shift) & 0xFF)
+        encoded[:, position] = keep | (raw.astype(np.uint8) << shift)
+    encoded[:, 118:128] = columns['name']
+    return encoded
+
+# --- Transforms ---
+
+OPERATIONS = ('set', 'add', 'scale', 'clamp', 'normalize', 'prefix')
+
+def field_limits(column):
+    """
+    Returns the (lowest, highest) decoded value a column may take, or None
+    if the column cannot be edited.
+    """
+    for name, _, _, _, bias, maximum in FIELD_LAYOUT:
+        if name == column:
+            return bias, maximum + bias
+    return None
+
+def editable_columns(pattern):
+    # Feedback is not a column: the decoder reads it from another byte
+    columns = [column for column, *_ in FIELD_LAYOUT]
+    matches = [column for column in columns if fnmatch.fnmatchcase(column, pattern)]
+    if not matches:
+        if fnmatch.fnmatchcase('feedback', pattern):
+            raise ValueError("'feedback' cannot be edited: the data sheet decoder does not read "
+                             "it from the byte the DX7 stores it in.")
+        raise ValueError(f"'{pattern}' matches no parameter.")
+    return matches
+
+def apply_transform(columns, transform):
+    """Applies one transform dict to the columns of many voices in place."""
+    operations = [key for key in transform if key in OPERATIONS]
+    if 'field' not in transform or len(operations) != 1:
+        raise ValueError(f"A transform needs a 'field' and one of {', '.join(OPERATIONS)}: {transform}")
+    operation = operations[0]
+    argument = transform[operation]
+
+    if operation == 'prefix':
+        if transform['field'] != 'name':
+            raise ValueError("'prefix' only applies to the field 'name'.")
+        names = columns['name']
+        for row in range(len(names)):
+            name = bytes(names[row]).decode('ascii', errors='ignore').strip()
+            names[row] = np.frombuffer(_name_bytes((argument + name)[:10], None), dtype=np.uint8)
+        return
+
+    matches = editable_columns(transform['field'])
+    if operation == 'normalize':
+        # Shift all matched columns of a voice together, keeping their balance
+        stacked = np.stack([columns[column].astype(np.float64) for column in matches])
+        offset = float(argument) - stacked.max(axis=0)
+    for column in matches:
+        values = columns[column].astype(np.float64)
+        if operation == 'set':
+            values[:] = float(argument)
+        elif operation == 'add':
+            values += float(argument)
+        elif operation == 'scale':
+            values *= float(argument)
+        elif operation == 'clamp':
+            values = np.clip(values, float(argument[0]), float(argument[1]))
+        else:
+            values += offset
+        lowest, highest = field_limits(column)
+        columns[column] = np.clip(np.rint(values), lowest, highest).astype(columns[column].dtype)
+
+def transform_voices(voices, transforms):
+    """Decodes an (M, 128) voices array, applies the transforms and encodes it again."""
+    import dx7vector
+
+    columns = dx7vector.decode_voices(voices)
+    columns['name'] = np.array(columns['name'])
+    for transform in transforms:
+        apply_transform(columns, transform)
+    return encode_columns(columns, voices)
+
+def transform_files(banks, output_dir, transforms, in_place=False):
+    """
+    Transforms every bank of the given (filepath, relname) pairs in one
+    batched pass and writes them below output_dir. Each output is a copy of
+    its source file with only the voice data and checksum of its bulk dumps
+    replaced. A file whose output would be the file itself fails unless
+    in_place is set. Returns (files written, voices changed, failed files
+    as (path, error)).
+    """
+    import dx7vector
+
+    voices, loaded, failed = dx7vector.load_banks([filepath for filepath, _ in banks])
+    if not loaded:
+        return 0, 0, failed
+    encoded = transform_voices(voices, transforms)
+    changed = int((encoded != voices).any(axis=1).sum())
+
+    relnames = dict(banks)
+    written = 0
+    bodies = {}
+    for bank_index, filepath in enumerate(loaded):
+        bodies.setdefault(filepath, []).append(encoded[bank_index * 32:(bank_index + 1) * 32].tobytes())
+    for filepath, new_bodies in bodies.items():
+        target = os.path.join(output_dir, relnames[filepath])
+        try:
+            if not in_place and os.path.exists(target) and os.path.samefile(filepath, target):
+                raise ValueError("The output would overwrite the source file, use --in-place.")
+            with open(filepath, 'rb') as f:
+                data = f.read()
+            offsets = [offset for offset, frame in iter_buffer_frames(data) if is_voice_bulk_frame(frame)]
+            if len(offsets) != len(new_bodies):
+                raise ValueError("The file changed while it was being transformed.")
+            output = bytearray(data)
+            for offset, body in zip(offsets, new_bodies):
+                # Header and MIDI channel stay as they are
+                output[offset + 6:offset + 4102] = body
+                output[offset + 4102] = sysex_checksum(body)
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            # A source overwritten in place is never left half written
+            with open(target + '.tmp', 'wb') as f:
+                f.write(output)
+            os.replace(target + '.tmp', target)
+            written += 1
+        except (IOError, ValueError) as e:
+            failed.append((filepath, str(e)))
+    return written, changed, failed
+
+class _TransformAction(argparse.Action):
+    # Collects the transform options in command line order
+    def __call__(self, parser, namespace, value, option_string=None):
+        transforms = getattr(namespace, self.dest) or []
+        if self.const == 'prefix':
+            transforms.append({'field': 'name', 'prefix': value})
+        else:
+            field, sep, argument = value.partition('=')
+            if not sep:
+                parser.error(f"{option_string} expects FIELD=VALUE")
+            if self.const == 'clamp':
+                lowest, sep, highest = argument.partition(':')
+                if not sep:
+                    parser.error(f"{option_string} expects FIELD=LOW:HIGH")
+                argument = [lowest, highest]
+            transforms.append({'field': field, self.const: argument})
+        setattr(namespace, self.dest, transforms)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Applies declarative edits to every voice of many DX7 banks.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('-o', '--output', required=True, help="directory for the edited banks")
+    for operation, metavar, text in (
+            ('set', 'FIELD=VALUE', "set the field"),
+            ('add', 'FIELD=N', "add N to the field"),
+            ('scale', 'FIELD=FACTOR', "multiply the field"),
+            ('clamp', 'FIELD=LOW:HIGH', "limit the field to a range"),
+            ('normalize', 'FIELD=TARGET', "shift the matched fields of each voice so "
+                                          "the largest one equals TARGET"),
+            ('prefix', 'TEXT', "put TEXT in front of every voice name")):
+        parser.add_argument(f'--{operation}', action=_TransformAction, dest='transforms',
+                            const=operation, metavar=metavar,
+                            help=f"{text}; FIELD may use wildcards, e.g. 'op*_level'")
+    parser.add_argument('--transforms', dest='transform_file', metavar='FILE',
+                        help="JSON file with a list of transforms, applied before the options")
+    parser.add_argument('--in-place', action='store_true',
+                        help="allow the output to overwrite the source files")
+    args = parser.parse_args()
+
+    if np is None:
+        print("Error: The transform engine requires NumPy: pip install numpy")
+        sys.exit(1)
+
+    transforms = []
+    if args.transform_file:
+        try:
+            with open(args.transform_file, 'r', encoding='utf-8') as f:
+                transforms = json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"Error reading '{args.transform_file}': {e}")
+            sys.exit(1)
+    transforms.extend(args.transforms or [])
+    if not transforms:
+        parser.error("no transforms given")
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    try:
+        written, changed, failed = transform_files(banks, args.output, transforms, args.in_place)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for filepath, error in failed:
+        print(f"FAILED {filepath}: {error}")
+    print(f"--- Wrote {written} files to '{args.output}/', {changed} voices changed. ---")
+    sys.exit(1 if failed or missing else 0)
+
+if __name__ == '__main__':
+    main()
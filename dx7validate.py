@@ -0,0 +1,269 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7validate.py
+# Bulk validation and repair of DX7 32-voice banks. Every bulk dump header
+# in a file is checked for truncation, the F7 terminator and the checksum
+# at byte 4102, and every byte of every voice is checked against the range
+# of the parameters packed into it (break point 0-99, curves 0-3, detune
+# 0-14, LFO wave 0-5, transpose 0-48, no unused bits set, ...).
+#
+# python dx7validate.py Archive/            reports every problem found
+# python dx7validate.py --repair Archive/   clamps bad values, sets the F7
+#                                           terminator and recomputes the
+#                                           checksum (originals kept as .bak)
+# python dx7sheet_32.py --lenient Archive/  converts banks with a bad
+#                                           checksum, repaired in memory
+#
+# The range check is one table lookup per byte: REPAIR_TABLE holds the
+# repaired value of every byte value at every voice position, and a byte is
+# valid when it repairs to itself. With NumPy the whole corpus is checked in
+# one vectorized pass.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import sys
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Fields of the 17 packed bytes of one operator: (byte, shift, bits, maximum, label)
+OPERATOR_FIELDS = (
+    [(i, 0, 7, 99, f"EG RATE {i + 1}") for i in range(4)] +
+    [(4 + i, 0, 7, 99, f"EG LEVEL {i + 1}") for i in range(4)] +
+    [(8, 0, 7, 99, "BREAK POINT"), (9, 0, 7, 99, "L DEPTH"), (10, 0, 7, 99, "R DEPTH"),
+     (11, 0, 2, 3, "L CURVE"), (11, 2, 2, 3, "R CURVE"),
+     (12, 0, 3, 7, "RATE SCALE"), (12, 3, 4, 14, "DETUNE"),
+     (13, 0, 2, 3, "AMP MOD SENS"), (13, 2, 3, 7, "KEY VEL"),
+     (14, 0, 7, 99, "LEVEL"),
+     (15, 0, 1, 1, "OSC MODE"), (15, 1, 5, 31, "COARSE"),
+     (16, 0, 7, 99, "FINE")]
+)
+
+# Fields of the global bytes 102-127
+GLOBAL_FIELDS = (
+    [(102 + i, 0, 7, 99, f"PITCH EG RATE {i + 1}") for i in range(4)] +
+    [(106 + i, 0, 7, 99, f"PITCH EG LEVEL {i + 1}") for i in range(4)] +
+    [(110, 0, 5, 31, "ALGORITHM"),
+     (111, 0, 3, 7, "FEEDBACK"), (111, 3, 1, 1, "OSC SYNC"),
+     (112, 0, 7, 99, "LFO SPEED"), (113, 0, 7, 99, "LFO DELAY"),
+     (114, 0, 7, 99, "LFO PMD"), (115, 0, 7, 99, "LFO AMD"),
+     (116, 0, 1, 1, "LFO SYNC"), (116, 1, 3, 5, "LFO WAVE"), (116, 4, 3, 7, "P MOD SENS"),
+     (117, 0, 7, 48, "TRANSPOSE")] +
+    [(118 + i, 0, 7, 127, f"NAME {i + 1}") for i in range(10)]
+)
+
+def _voice_fields():
+    # Operator blocks are stored OP6 first
+    fields = [[] for _ in range(128)]
+    for block in range(6):
+        for byte, shift, bits, maximum, label in OPERATOR_FIELDS:
+            fields[block * 17 + byte].append((shift, bits, maximum, f"OP{6 - block} {label}"))
+    for byte, shift, bits, maximum, label in GLOBAL_FIELDS:
+        fields[byte].append((shift, bits, maximum, label))
+    return fields
+
+VOICE_FIELDS = _voice_fields()
+
+def _repair_byte(fields, value):
+    repaired = 0
+    for shift, bits, maximum, _ in fields:
+        repaired |= min((value >> shift) & ((1 << bits) - 1), maximum) << shift
+    return repaired
+
+# REPAIR_TABLE[position][value]: the byte with every field clamped and unused bits cleared
+REPAIR_TABLE = [bytes(_repair_byte(fields, value) for value in range(256)) for fields in VOICE_FIELDS]
+
+BULK_HEADER = re.compile(rb'\xf0\x43[\x00-\x0f]\x09\x20\x00')
+BULK_SIZE = 4104
+
+def describe(position, value):
+    """Names the out-of-range fields of one voice byte."""
+    problems = []
+    used = 0
+    for shift, bits, maximum, label in VOICE_FIELDS[position]:
+        field = (value >> shift) & ((1 << bits) - 1)
+        used |= ((1 << bits) - 1) << shift
+        if field > maximum:
+            problems.append(f"{label} = {field} (max {maximum})")
+    if value & ~used:
+        labels = "/".join(label for _, _, _, label in VOICE_FIELDS[position])
+        problems.append(f"{labels}: unused bits set (0x{value:02X})")
+    return "; ".join(problems)
+
+def bad_bytes(bodies):
+    """
+    Checks the 4096-byte voice data of many banks at once. Returns a list of
+    (bank index, voice index, position, value) for every out-of-range byte,
+    all 0-based.
+    """
+    if not bodies:
+        return []
+    if np is not None:
+        table = np.frombuffer(b"".join(REPAIR_TABLE), dtype=np.uint8).reshape(128, 256)
+        voices = np.frombuffer(b"".join(bytes(body) for body in bodies), dtype=np.uint8).reshape(-1, 128)
+        rows, positions = np.nonzero(table[np.arange(128), voices] != voices)
+        return [(int(row) // 32, int(row) % 32, int(position), int(voices[row, position]))
+                for row, position in zip(rows, positions)]
+
+    found = []
+    for bank_index, body in enumerate(bodies):
+        for voice_index in range(32):
+            voice = body[voice_index * 128:(voice_index + 1) * 128]
+            for position, value in enumerate(voice):
+                if REPAIR_TABLE[position][value] != value:
+                    found.append((bank_index, voice_index, position, value))
+    return found
+
+def repair_voice_data(voice_bulk_data):
+    """Returns the 4096 bytes of voice data with every out-of-range value clamped."""
+    return bytes(REPAIR_TABLE[i & 127][value] for i, value in enumerate(voice_bulk_data))
+
+def scan_file(data):
+    """
+    Finds every DX7 32-voice bulk header in the bytes of a file. Returns
+    a list of (offset, frame, problems) where frame is the complete 4104-byte
+    message, or None if it was truncated.
+    """
+    from dx7sheet_32 import sysex_checksum
+
+    found = []
+    for match in BULK_HEADER.finditer(data):
+        offset = match.start()
+        frame = data[offset:offset + BULK_SIZE]
+        problems = []
+        # Another F0, or an F7 before the last byte, means the message ends early
+        end = min((i for i in (frame.find(b'\xf0', 1), frame.find(b'\xf7', 1, BULK_SIZE - 1))
+                   if i != -1), default=None)
+        if end is not None or len(frame) < BULK_SIZE:
+            size = len(frame) if end is None else end + (frame[end] == 0xF7)
+            found.append((offset, None, [f"truncated bulk dump ({size} of {BULK_SIZE} bytes)"]))
+            continue
+        if frame[-1] != 0xF7:
+            problems.append(f"missing F7 terminator (found 0x{frame[-1]:02X})")
+        checksum = sysex_checksum(frame[6:4102])
+        if frame[4102] != checksum:
+            problems.append(f"checksum mismatch (stored 0x{frame[4102]:02X}, computed 0x{checksum:02X})")
+        found.append((offset, frame, problems))
+    return found
+
+def validate_files(filepaths, chunk=4096):
+    """
+    Validates many files, checking the voice bytes of up to chunk banks per
+    vectorized pass. Returns {filepath: [problem, ...]} for every file with
+    problems; a file without a single bulk header is reported as such.
+    """
+    report = {}
+    pending = []   # (filepath, bank number, voice data)
+
+    def flush():
+        for bank_index, voice_index, position, value in bad_bytes([body for _, _, body in pending]):
+            filepath, bank_num, _ = pending[bank_index]
+            bank = f"bank {bank_num} " if bank_num > 1 else ""
+            report.setdefault(filepath, []).append(
+                f"{bank}voice {voice_index + 1:02d} byte {position}: {describe(position, value)}")
+        pending.clear()
+
+    for filepath in filepaths:
+        try:
+            with open(filepath, 'rb') as f:
+                data = f.read()
+        except IOError as e:
+            report[filepath] = [f"cannot be read: {e}"]
+            continue
+        banks = scan_file(data)
+        if not banks:
+            report[filepath] = ["no DX7 32-voice bulk dump found"]
+            continue
+        for bank_num, (_, frame, problems) in enumerate(banks, 1):
+            bank = f"bank {bank_num} " if len(banks) > 1 else ""
+            report.setdefault(filepath, []).extend(bank + problem for problem in problems)
+            if frame is not None:
+                pending.append((filepath, bank_num, frame[6:4102]))
+        if not report.get(filepath):
+            report.pop(filepath, None)
+        if len(pending) >= chunk:
+            flush()
+    flush()
+    return report
+
+def repair_file(filepath, backup=True):
+    """
+    Rewrites every complete bulk dump in a file with clamped values, the F7
+    terminator and a recomputed checksum. Returns the number of repaired
+    dumps; the file is left untouched when nothing needed repair.
+    """
+    from dx7sheet_32 import build_sysex
+
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    repaired = bytearray(data)
+    count = 0
+    for offset, frame, _ in scan_file(data):
+        if frame is None:
+            continue
+        fixed = build_sysex(repair_voice_data(frame[6:4102]))
+        fixed = frame[:6] + fixed[6:]  # keep the original MIDI channel
+        if fixed != frame:
+            repaired[offset:offset + BULK_SIZE] = fixed
+            count += 1
+    if count:
+        if backup:
+            os.replace(filepath, filepath + ".bak")
+        with open(filepath + ".tmp", 'wb') as f:
+            f.write(repaired)
+        os.replace(filepath + ".tmp", filepath)
+    return count
+
+def main():
+    from dx7sheet_32 import collect_syx_files
+
+    parser = argparse.ArgumentParser(
+        description="Checks DX7 32-voice banks for bad checksums and out-of-range values.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('--repair', action='store_true',
+                        help="clamp bad values and recompute the checksums in place")
+    parser.add_argument('--no-backup', action='store_true',
+                        help="with --repair, do not keep the original as FILE.bak")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+    filepaths = [filepath for filepath, _ in banks]
+
+    report = validate_files(filepaths)
+    for filepath, problems in report.items():
+        print(f"{filepath}:")
+        for problem in problems:
+            print(f"    {problem}")
+
+    if args.repair:
+        repaired = 0
+        for filepath in report:
+            try:
+                count = repair_file(filepath, backup=not args.no_backup)
+            except (IOError, OSError) as e:
+                print(f"Error repairing '{filepath}': {e}")
+                continue
+            if count:
+                repaired += 1
+                print(f"Repaired {count} bulk dump(s) in '{filepath}'.")
+        print(f"\n--- {len(report)} of {len(filepaths)} files had problems, {repaired} repaired. ---")
+        sys.exit(1 if missing else 0)
+
+    print(f"\n--- {len(report)} of {len(filepaths)} files had problems. ---")
+    sys.exit(1 if report or missing else 0)
+
+if __name__ == '__main__':
+    main()
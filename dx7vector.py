@@ -0,0 +1,241 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7vector.py
+# Vectorized decoder for whole corpora. Views N banks as one
+# (N*32, 128) uint8 array and extracts every voice parameter with
+# array-wide shifts and masks into a dict of columns, one entry per voice.
+# The values are identical to those produced by parse_single_voice().
+#
+# python dx7vector.py --verify Archive/   decodes a corpus and cross-checks
+#                                         every voice against the parser
+#
+# Requires NumPy (optional dependency of the project).
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import argparse
+
+try:
+    import numpy as np
+except ImportError:  # the layout tables below stay usable without NumPy
+    np = None
+
+from dx7sheet_32 import (NOTE_NAMES, CURVE_MODES, LFO_WAVES, FIXED_FREQ_MAP,
+                         collect_syx_files, iter_voice_banks, parse_single_voice)
+
+# --- Packed Voice Layout ---
+# (column, byte offset, right shift, mask, bias) - mirrors the bit-masking in
+# parse_single_voice(). Operator offsets are relative to the 17-byte block.
+
+OPERATOR_FIELDS = [
+    ('eg_rate1', 0, 0, 0xFF, 0), ('eg_rate2', 1, 0, 0xFF, 0),
+    ('eg_rate3', 2, 0, 0xFF, 0), ('eg_rate4', 3, 0, 0xFF, 0),
+    ('eg_level1', 4, 0, 0xFF, 0), ('eg_level2', 5, 0, 0xFF, 0),
+    ('eg_level3', 6, 0, 0xFF, 0), ('eg_level4', 7, 0, 0xFF, 0),
+    ('break_point', 8, 0, 0xFF, 0),
+    ('l_depth', 9, 0, 0xFF, 0),
+    ('r_depth', 10, 0, 0xFF, 0),
+    ('l_curve', 11, 0, 0x03, 0),
+    ('r_curve', 11, 2, 0x03, 0),
+    ('rate_scale', 12, 0, 0x07, 0),
+    ('tune', 12, 3, 0x0F, -7),
+    ('key_vel', 13, 2, 0x07, 0),
+    ('amp_mod_sens', 13, 0, 0x03, 0),
+    ('level', 14, 0, 0xFF, 0),
+    ('osc_mode', 15, 0, 0x01, 0),
+    ('coarse', 15, 1, 0x7F, 0),
+    ('fine_raw', 16, 0, 0xFF, 0),
+]
+
+GLOBAL_FIELDS = [
+    ('pitch_eg_rate1', 102, 0, 0xFF, 0), ('pitch_eg_rate2', 103, 0, 0xFF, 0),
+    ('pitch_eg_rate3', 104, 0, 0xFF, 0), ('pitch_eg_rate4', 105, 0, 0xFF, 0),
+    ('pitch_eg_level1', 106, 0, 0xFF, 0), ('pitch_eg_level2', 107, 0, 0xFF, 0),
+    ('pitch_eg_level3', 108, 0, 0xFF, 0), ('pitch_eg_level4', 109, 0, 0xFF, 0),
+    ('algorithm', 110, 0, 0x1F, 1),
+    ('feedback', 110, 5, 0x07, 0),
+    ('osc_sync', 111, 3, 0x01, 0),
+    ('lfo_speed', 112, 0, 0xFF, 0),
+    ('lfo_delay', 113, 0, 0xFF, 0),
+    ('lfo_pmd', 114, 0, 0xFF, 0),
+    ('lfo_amd', 115, 0, 0xFF, 0),
+    ('lfo_sync', 116, 0, 0x01, 0),
+    ('lfo_wave', 116, 1, 0x07, 0),
+    ('p_mod_sens', 116, 4, 0x07, 0),
+]
+
+def operator_offset(op_num):
+    """Start of the 17-byte block of OP1..OP6; the DX7 stores OP6 first."""
+    return (6 - op_num) * 17
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("dx7vector requires NumPy: pip install numpy")
+
+def _extract(column, shift, mask, bias):
+    if shift:
+        column = column >> shift
+    if mask != 0xFF:
+        column = column & mask
+    if bias:
+        column = column.astype(np.int16) + bias
+    return column
+
+def load_banks(paths):
+    """
+    Reads every DX7 32-voice bulk message from the given files and returns
+    them as one (N*32, 128) uint8 array, the source file of each of the N
+    banks and a list of (path, error) pairs for unusable files.
+    """
+    _require_numpy()
+    bodies = []
+    loaded = []
+    failed = []
+    for filepath in paths:
+        try:
+            found = [bytes(body) for _, body in iter_voice_banks(filepath)]
+        except (IOError, ValueError) as e:
+            failed.append((filepath, str(e)))
+            continue
+        if not found:
+            failed.append((filepath, "No DX7 32-voice bulk message found."))
+            continue
+        bodies.extend(found)
+        loaded.extend([filepath] * len(found))
+
+    voices = np.frombuffer(b"".join(bodies), dtype=np.uint8).reshape(-1, 128)
+    return voices, loaded, failed
+
+def decode_voices(voices):
+    """
+    Decodes an (M, 128) array of packed voices into a dict of columns of
+    length M. Per-operator columns are named op1_eg_rate1 ... op6_fine_raw;
+    'name' holds the raw 10 name bytes per voice as an (M, 10) array.
+    """
+    _require_numpy()
+    voices = np.asarray(voices, dtype=np.uint8).reshape(-1, 128)
+    columns = {}
+    fixed_table = np.array([FIXED_FREQ_MAP[i] for i in range(4)])
+
+    for op_num in range(1, 7):
+        block = voices[:, operator_offset(op_num):operator_offset(op_num) + 17]
+        prefix = f"op{op_num}_"
+        for name, offset, shift, mask, bias in OPERATOR_FIELDS:
+            columns[prefix + name] = _extract(block[:, offset], shift, mask, bias)
+
+        coarse = columns[prefix + 'coarse']
+        ratio = np.where(coarse == 0, 0.5, coarse.astype(np.float64))
+        columns[prefix + 'coarse_val'] = np.where(columns[prefix + 'osc_mode'] == 1,
+                                                  fixed_table[coarse & 3], ratio)
+
+    for name, offset, shift, mask, bias in GLOBAL_FIELDS:
+        columns[name] = _extract(voices[:, offset], shift, mask, bias)
+
+    columns['name'] = voices[:, 118:128]
+    return columns
+
+def decode_name(name_bytes):
+    return bytes(name_bytes).decode('ascii', errors='ignore').strip()
+
+def to_params(columns, row):
+    """Rebuilds the parse_single_voice() dict for one row of the columns."""
+    params = {'ops': []}
+    for op_num in range(1, 7):
+        c = lambda key: int(columns[f"op{op_num}_{key}"][row])
+        bp = c('break_point')
+        op = {
+            'eg_rate': [c(f'eg_rate{i}') for i in range(1, 5)],
+            'eg_level': [c(f'eg_level{i}') for i in range(1, 5)],
+            'break_point': NOTE_NAMES[bp] if 0 <= bp <= 99 else 'N/A',
+            'l_depth': c('l_depth'),
+            'r_depth': c('r_depth'),
+            'l_curve': CURVE_MODES[c('l_curve')],
+            'r_curve': CURVE_MODES[c('r_curve')],
+            'rate_scale': c('rate_scale'),
+            'tune': c('tune'),
+            'key_vel': c('key_vel'),
+            'amp_mod_sens': c('amp_mod_sens'),
+            'level': c('level'),
+            'osc_mode': 'FIX' if c('osc_mode') else 'RATIO',
+            'fine_raw': c('fine_raw'),
+            'coarse_val': float(columns[f"op{op_num}_coarse_val"][row]),
+        }
+        params['ops'].append(op)
+
+    g = lambda key: int(columns[key][row])
+    params['pitch_eg_rate'] = [g(f'pitch_eg_rate{i}') for i in range(1, 5)]
+    params['pitch_eg_level'] = [g(f'pitch_eg_level{i}') for i in range(1, 5)]
+    params['algorithm'] = g('algorithm')
+    params['feedback'] = g('feedback')
+    params['osc_sync'] = 'ON' if g('osc_sync') else 'OFF'
+    params['lfo_speed'] = g('lfo_speed')
+    params['lfo_delay'] = g('lfo_delay')
+    params['lfo_pmd'] = g('lfo_pmd')
+    params['lfo_amd'] = g('lfo_amd')
+    params['lfo_sync'] = 'ON' if g('lfo_sync') else 'OFF'
+    params['lfo_wave'] = LFO_WAVES[g('lfo_wave')]
+    params['p_mod_sens'] = g('p_mod_sens')
+    params['transpose'] = "C3"
+    params['name'] = decode_name(columns['name'][row])
+    return params
+
+def verify(voices, columns):
+    """
+    Returns the row numbers whose columns disagree with parse_single_voice().
+    A voice neither side can decode (LFO wave 6 or 7) counts as a match.
+    """
+    mismatches = []
+    for row in range(len(voices)):
+        try:
+            params = to_params(columns, row)
+        except KeyError:
+            params = None
+        try:
+            expected = parse_single_voice(bytes(voices[row]))
+        except KeyError:
+            expected = None
+        if params != expected:
+            mismatches.append(row)
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decodes DX7 banks into parameter columns with NumPy.")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help=".syx file, directory (searched recursively) or glob pattern")
+    parser.add_argument('--verify', action='store_true',
+                        help="cross-check every voice against parse_single_voice()")
+    args = parser.parse_args()
+
+    banks, missing = collect_syx_files(args.paths)
+    for path in missing:
+        print(f"Error: File not found: {path}")
+
+    start = time.perf_counter()
+    voices, loaded, failed = load_banks([filepath for filepath, _ in banks])
+    loaded_at = time.perf_counter()
+    columns = decode_voices(voices)
+    decoded_at = time.perf_counter()
+
+    for filepath, error in failed:
+        print(f"FAILED {filepath}: {error}")
+    print(f"Read {len(loaded)} banks in {loaded_at - start:.3f}s, "
+          f"decoded {len(voices)} voices into {len(columns)} columns in {decoded_at - loaded_at:.3f}s.")
+
+    if args.verify:
+        mismatches = verify(voices, columns)
+        print(f"Verified against parse_single_voice(): {len(mismatches)} mismatches.")
+        if mismatches:
+            sys.exit(1)
+
+    sys.exit(1 if failed or missing else 0)
+
+if __name__ == '__main__':
+    main()
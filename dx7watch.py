@@ -0,0 +1,321 @@
+##################################
+# DX7 Voice Data Sheet Generator #
+##################################
+# dx7watch.py
+# Watch mode. Monitors one or more directories (recursively) and converts
+# every .syx file that is added or modified into the 'Sheet' folder, and
+# deletes the sheets of files that are removed. On Linux the directories
+# are watched with inotify; elsewhere, or with --poll, they are rescanned
+# every few seconds. Bursts of changes are debounced into one batch.
+#
+# python dx7watch.py Archive/                   watches Archive/, sheets go to Sheet/
+# python dx7watch.py -o Sheets/ Incoming/ Archive/
+# python dx7watch.py --poll 5 //nas/patches/    polls a network share every 5s
+#
+# The output folder uses the same manifest as 'dx7sheet_32.py --incremental',
+# so only new or modified banks are converted at start-up, and within a
+# bank only the voices that changed. Parsed voices of recently converted
+# banks are kept in an in-memory LRU, so repeated edits are cheap.
+#
+# SPDX-License-Identifier: MIT
+####################################
+
+
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import argparse
+from collections import OrderedDict
+
+from dx7sheet_32 import (collect_syx_files, convert_bank_cached, load_manifest, save_manifest,
+                         remove_outputs)
+
+# --- inotify (Linux) ---
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+def is_syx(path):
+    return path.lower().endswith('.syx')
+
+class InotifyWatcher:
+    """Recursive directory watch through the Linux inotify API, via ctypes."""
+
+    def __init__(self, roots):
+        import ctypes
+        import ctypes.util
+
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}   # watch descriptor -> directory
+        for root in roots:
+            self.add_tree(root)
+
+    def add_tree(self, directory):
+        """Watches a directory and all directories below it; returns the .syx files found in it."""
+        found = []
+        for root, dirs, files in os.walk(directory):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = root
+            found.extend(os.path.join(root, name) for name in files if is_syx(name))
+        return found
+
+    def wait(self, timeout):
+        """
+        Waits up to timeout seconds (None: forever) and returns a list of
+        (kind, path) events, kind being 'changed', 'removed' or 'rescan'.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EINTR:
+                return []
+            raise
+
+        events = []
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, size = EVENT_HEADER.unpack_from(buffer, offset)
+            name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + size]
+            offset += EVENT_HEADER.size + size
+            if mask & IN_Q_OVERFLOW:
+                events.append(('rescan', None))
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            directory = self.dirs.get(wd)
+            if directory is None or not size:
+                continue
+            path = os.path.join(directory, os.fsdecode(name.rstrip(b'\0')))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may have landed before the new watch was in place
+                    events.extend(('changed', found) for found in self.add_tree(path))
+                elif mask & IN_MOVED_FROM:
+                    events.append(('rescan', None))
+            elif is_syx(path):
+                if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    events.append(('changed', path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append(('removed', path))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class PollWatcher:
+    """Portable fallback: rescans the directories and compares size and mtime."""
+
+    def __init__(self, roots, interval=2.0):
+        self.roots = roots
+        self.interval = interval
+        self.seen = self.scan()
+
+    def scan(self):
+        state = {}
+        for filepath, _ in collect_syx_files(self.roots)[0]:
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                continue
+            state[filepath] = (st.st_size, st.st_mtime_ns)
+        return state
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        state = self.scan()
+        events = [('changed', path) for path, stat in state.items() if self.seen.get(path) != stat]
+        events.extend(('removed', path) for path in self.seen if path not in state)
+        self.seen = state
+        return events
+
+    def close(self):
+        pass
+
+# --- Parsed voice cache ---
+
+class ParsedCache(OrderedDict):
+    """LRU mapping of voice hash to parsed params, used by convert_voices()."""
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.capacity = capacity
+
+    def get(self, key, default=None):
+        if key in self:
+            self.move_to_end(key)
+            return self[key]
+        return default
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+
+# --- Watch loop ---
+
+class SheetUpdater:
+    """Converts changed banks into output_dir and keeps its manifest up to date."""
+
+    def __init__(self, roots, output_dir, lenient=False, cache_banks=256):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.output_dir = output_dir
+        self.lenient = lenient
+        self.manifest = load_manifest(output_dir)
+        self.parsed = ParsedCache(cache_banks * 32)
+
+    def bank_dir(self, filepath):
+        # Same layout as a batch run over the directory: one folder per bank
+        filepath = os.path.abspath(filepath)
+        for root in self.roots:
+            if filepath.startswith(root + os.sep):
+                relname = os.path.relpath(filepath, root)
+                break
+        else:
+            relname = os.path.basename(filepath)
+        return os.path.join(self.output_dir, os.path.splitext(relname)[0])
+
+    def update(self, changed, removed):
+        """Converts the changed files, drops the removed ones and saves the manifest."""
+        stamp = time.strftime('%H:%M:%S')
+        for filepath in sorted(removed):
+            entry = self.manifest.pop(os.path.abspath(filepath), None)
+            if entry is not None:
+                remove_outputs(self.output_dir, entry['outputs'])
+                print(f"[{stamp}] REMOVED {filepath} ({len(entry['outputs'])} sheets deleted)")
+
+        for filepath in sorted(changed):
+            key = os.path.abspath(filepath)
+            if not os.path.isfile(filepath):
+                continue
+            previous = self.manifest.get(key)
+            try:
+                written, errors, entry = convert_bank_cached(
+                    filepath, self.bank_dir(filepath), self.output_dir, previous,
+                    lenient=self.lenient, parsed=self.parsed)
+            except (IOError, ValueError) as e:
+                print(f"[{stamp}] FAILED {filepath}: {e}")
+                continue
+            self.manifest[key] = entry
+            if errors:
+                print(f"[{stamp}] FAILED {filepath}: {'; '.join(errors)}")
+            elif written or previous is None:
+                print(f"[{stamp}] OK     {filepath} ({written} sheets)")
+
+        save_manifest(self.output_dir, self.manifest)
+
+    def sync(self):
+        """Brings the output up to date with the directories, e.g. at start-up."""
+        banks, _ = collect_syx_files(self.roots)
+        present = {os.path.abspath(filepath) for filepath, _ in banks}
+        removed = [source for source in self.manifest if source not in present
+                   and any(source.startswith(root + os.sep) for root in self.roots)]
+        self.update([filepath for filepath, _ in banks], removed)
+        return len(banks)
+
+def watch(source, updater, debounce=0.5, max_delay=10.0):
+    """
+    Runs until interrupted: collects events from source and hands them to
+    updater once no new event arrived for debounce seconds, or at the
+    latest max_delay seconds after the first pending one.
+    """
+    changed, removed = set(), set()
+    first = None
+    while True:
+        if first is None:
+            timeout = None
+        else:
+            timeout = max(0.0, min(debounce, first + max_delay - time.monotonic()))
+        events = source.wait(timeout)
+        for kind, path in events:
+            if kind == 'rescan':
+                updater.sync()
+                changed.clear()
+                removed.clear()
+                continue
+            if kind == 'changed':
+                changed.add(path)
+                removed.discard(path)
+            else:
+                removed.add(path)
+                changed.discard(path)
+        if (changed or removed) and first is None:
+            first = time.monotonic()
+        if first is not None and (not events or time.monotonic() - first >= max_delay):
+            if changed or removed:
+                updater.update(changed, removed)
+            changed, removed = set(), set()
+            first = None
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watches directories and regenerates DX7 data sheets as .syx files change.")
+    parser.add_argument('paths', nargs='+', metavar='DIR', help="directory to watch (recursively)")
+    parser.add_argument('-o', '--output', default="Sheet", help="output directory (default: Sheet)")
+    parser.add_argument('--poll', type=float, metavar='SECONDS',
+                        help="poll every SECONDS instead of using inotify")
+    parser.add_argument('--debounce', type=float, default=0.5,
+                        help="quiet time before a batch of changes is converted (default: 0.5s)")
+    parser.add_argument('--cache', type=int, default=256,
+                        help="banks whose parsed voices are kept in memory (default: 256)")
+    parser.add_argument('--lenient', action='store_true',
+                        help="convert banks with a bad checksum, clamping out-of-range values")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        if not os.path.isdir(path):
+            print(f"Error: Directory not found: {path}")
+            sys.exit(1)
+
+    updater = SheetUpdater(args.paths, args.output, args.lenient, args.cache)
+    print("--- DX7 Voice Data Sheet Generator (Watch Mode) ---")
+
+    # Start watching before the initial sync so no change slips through in between
+    source = None
+    if args.poll is None and sys.platform.startswith('linux'):
+        try:
+            source = InotifyWatcher(args.paths)
+        except (OSError, AttributeError) as e:
+            print(f"inotify is not available ({e}), falling back to polling.")
+    if source is None:
+        source = PollWatcher(args.paths, args.poll or 2.0)
+        print(f"Polling {', '.join(args.paths)} every {source.interval:g}s. Press Ctrl+C to stop.")
+    else:
+        print(f"Watching {', '.join(args.paths)}. Press Ctrl+C to stop.")
+
+    count = updater.sync()
+    print(f"{count} banks up to date in '{args.output}/'.")
+
+    try:
+        watch(source, updater, args.debounce)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        source.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: MIT
+# -*- coding: utf-8 -*-
+#
+# Round-trip tests of the voice encoder in dx7transform.py.
+# python -m pytest tests
+
+import os
+import sys
+import random
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dx7bench import random_voice, random_bank
+from dx7sheet_32 import parse_single_voice, iter_buffer_frames, is_voice_bulk_frame, sysex_checksum
+from dx7validate import REPAIR_TABLE
+import dx7transform
+from dx7transform import encode_voice, encode_bank, editable_columns
+
+COUNT = 500
+
+def decodable_voices(rng, count):
+    """Arbitrary 7-bit voices, without those the decoder rejects (LFO wave 6 or 7)."""
+    voices = []
+    while len(voices) < count:
+        data = bytes(rng.randint(0, 127) for _ in range(128))
+        try:
+            parse_single_voice(data)
+        except KeyError:
+            continue
+        voices.append(data)
+    return voices
+
+def without_feedback(params):
+    return {key: value for key, value in params.items() if key != 'feedback'}
+
+class EncodeVoiceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+
+    def test_arbitrary_voice_with_base_round_trips_exactly(self):
+        for data in decodable_voices(self.rng, COUNT):
+            self.assertEqual(encode_voice(parse_single_voice(data), data), data)
+
+    def test_in_range_voice_round_trips_through_decoder(self):
+        for _ in range(COUNT):
+            params = parse_single_voice(random_voice(self.rng))
+            voice = encode_voice(params)
+            self.assertEqual(parse_single_voice(voice), params)
+            for position, value in enumerate(voice):
+                self.assertEqual(REPAIR_TABLE[position][value], value, f"byte {position}")
+
+    def test_feedback_is_stored_in_byte_111(self):
+        for _ in range(COUNT):
+            params = parse_single_voice(random_voice(self.rng))
+            feedback = self.rng.randint(1, 7)
+            params['feedback'] = feedback
+            voice = encode_voice(params)
+            self.assertEqual(voice[111] & 7, feedback)
+            decoded = parse_single_voice(voice)
+            self.assertEqual(without_feedback(decoded), without_feedback(params))
+            # Known limitation: the decoder reads feedback from byte 110
+            self.assertEqual(decoded['feedback'], 0)
+
+    def test_out_of_range_values_are_rejected(self):
+        cases = [('eg_rate', 100), ('level', 100), ('l_depth', 100), ('rate_scale', 8),
+                 ('tune', 8), ('algorithm', 33), ('feedback', 8), ('lfo_speed', 100),
+                 ('pitch_eg_level', 100), ('p_mod_sens', 8)]
+        for field, value in cases:
+            data = random_voice(self.rng)
+            params = parse_single_voice(data)
+            target = params['ops'][0] if field in params['ops'][0] else params
+            target[field] = [value] * 4 if isinstance(target[field], list) else value
+            for base in (None, data):
+                with self.assertRaises(ValueError, msg=f"{field} = {value}"):
+                    encode_voice(params, base)
+
+    def test_encode_bank_gives_one_complete_bulk_dump(self):
+        voices = [random_voice(self.rng) for _ in range(32)]
+        bank = encode_bank([parse_single_voice(voice) for voice in voices], voices)
+        frames = [frame for _, frame in iter_buffer_frames(bank) if is_voice_bulk_frame(frame)]
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(bank[6:4102], b"".join(voices))
+        self.assertEqual(bank[4102], sysex_checksum(bank[6:4102]))
+
+@unittest.skipIf(dx7transform.np is None, "NumPy is not installed")
+class TransformTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_vectorized_encoder_round_trips_exactly(self):
+        np = dx7transform.np
+        data = b"".join(decodable_voices(self.rng, COUNT))
+        voices = np.frombuffer(data, dtype=np.uint8).reshape(-1, 128)
+        self.assertTrue(np.array_equal(dx7transform.transform_voices(voices, []), voices))
+
+    def test_feedback_is_not_editable(self):
+        self.assertNotIn('feedback', editable_columns('*'))
+        with self.assertRaises(ValueError):
+            editable_columns('feedback')
+
+    def test_source_is_not_overwritten_without_in_place(self):
+        source = os.path.join(self.directory, 'bank.syx')
+        original = random_bank(self.rng)
+        with open(source, 'wb') as f:
+            f.write(original)
+        transforms = [{'field': 'lfo_delay', 'set': 0}]
+
+        written, _, failed = dx7transform.transform_files(
+            [(source, 'bank.syx')], self.directory, transforms)
+        self.assertEqual((written, len(failed)), (0, 1))
+        with open(source, 'rb') as f:
+            self.assertEqual(f.read(), original)
+
+        written, _, failed = dx7transform.transform_files(
+            [(source, 'bank.syx')], self.directory, transforms, in_place=True)
+        self.assertEqual((written, failed), (1, []))
+        with open(source, 'rb') as f:
+            body = f.read()[6:4102]
+        for i in range(32):
+            self.assertEqual(parse_single_voice(body[i * 128:(i + 1) * 128])['lfo_delay'], 0)
+
+if __name__ == '__main__':
+    unittest.main()